@@ -123,7 +123,11 @@ def create_reviewer_agent(client: AzureOpenAI):
 # ── Brand kit upload → vector store ─────────────────────────────────
 
 
-def upload_brand_kit(client: AzureOpenAI, brand_kit_path: str) -> str:
+def upload_brand_kit(
+    client: AzureOpenAI,
+    brand_kit_path: str,
+    name: str = "Microsoft Employee Social Media Guidelines",
+) -> str:
     """Upload the brand kit to a vector store for File Search and return the store ID."""
     # Upload file
     with open(brand_kit_path, "rb") as f:
@@ -132,7 +136,7 @@ def upload_brand_kit(client: AzureOpenAI, brand_kit_path: str) -> str:
 
     # Create vector store with the file
     vector_store = client.vector_stores.create(
-        name="Microsoft Employee Social Media Guidelines",
+        name=name,
         file_ids=[file_obj.id],
     )
     print(f"  📦 Vector store created: {vector_store.id}")
@@ -152,31 +156,72 @@ def upload_brand_kit(client: AzureOpenAI, brand_kit_path: str) -> str:
     return vector_store.id
 
 
+def delete_brand_kit(client: AzureOpenAI, vector_store_id: str):
+    """Delete a brand kit vector store together with the files uploaded into it."""
+    try:
+        for vs_file in client.vector_stores.files.list(vector_store_id=vector_store_id):
+            try:
+                client.files.delete(vs_file.id)
+                print(f"  🗑️  Deleted brand kit file: {vs_file.id}")
+            except Exception as e:
+                print(f"  ⚠️  Failed to delete file {vs_file.id}: {e}")
+        client.vector_stores.delete(vector_store_id)
+        print(f"  🗑️  Deleted vector store: {vector_store_id}")
+    except Exception as e:
+        print(f"  ⚠️  Failed to delete vector store {vector_store_id}: {e}")
+
+
 # ── Run an agent turn ───────────────────────────────────────────────
 
 
-def run_research_turn(client: AzureOpenAI, agent: _ResponsesAgent, user_message: str) -> str:
+def _add_usage(usage: dict | None, input_tokens: int, output_tokens: int):
+    """Accumulate token counts into a caller-supplied usage dict."""
+    if usage is None:
+        return
+    usage["input_tokens"] = usage.get("input_tokens", 0) + (input_tokens or 0)
+    usage["output_tokens"] = usage.get("output_tokens", 0) + (output_tokens or 0)
+    usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+
+
+def run_research_turn(
+    client: AzureOpenAI,
+    agent: _ResponsesAgent,
+    user_message: str,
+    usage: dict | None = None,
+    instructions: str | None = None,
+) -> str:
     """
     Execute a Research Agent turn using the **Responses API** with
     ``web_search_preview`` so the model can search the live web.
 
     This is a single-shot call (no thread); all context is in-prompt.
+    ``instructions`` replaces the agent's own instructions for this turn.
+    If ``usage`` is given, the turn's token counts are added to it.
     """
-    combined_input = f"{agent.instructions}\n\n---\n\nUser request:\n{user_message}"
+    combined_input = f"{instructions or agent.instructions}\n\n---\n\nUser request:\n{user_message}"
 
     response = client.responses.create(
         model=agent.model,
         input=combined_input,
         tools=[{"type": "web_search_preview"}],
     )
+    if response.usage is not None:
+        _add_usage(usage, response.usage.input_tokens, response.usage.output_tokens)
 
     return response.output_text
 
 
-def run_agent_turn(client: AzureOpenAI, assistant, thread_id: str, user_message: str) -> str:
+def run_agent_turn(
+    client: AzureOpenAI,
+    assistant,
+    thread_id: str,
+    user_message: str,
+    usage: dict | None = None,
+) -> str:
     """
     Send a message to an Assistants-API thread and return the response.
     Polls for completion with backoff.
+    If ``usage`` is given, the run's token counts are added to it.
     """
     # Add user message
     client.beta.threads.messages.create(
@@ -196,6 +241,8 @@ def run_agent_turn(client: AzureOpenAI, assistant, thread_id: str, user_message:
         run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
 
         if run.status == "completed":
+            if run.usage is not None:
+                _add_usage(usage, run.usage.prompt_tokens, run.usage.completion_tokens)
             break
 
         if run.status in ("failed", "cancelled", "expired"):
@@ -0,0 +1,185 @@
+"""
+TrendSurf Copilot — Brand Registry
+Maps brand IDs to brand kit files and keeps a bounded set of kits "live".
+
+A live kit owns a File Search vector store built from the kit file plus a
+Brand Guard assistant bound to that store.  Both are created lazily on first
+use and held in a size-bounded LRU so switching between recently used brands
+skips the upload/indexing cold start.  Live resources are keyed by kit file,
+so brands that share a kit share one vector store and assistant (the brand
+itself is named in the Brand Guard prompt).  Evicting a kit deletes its
+remote resources.
+
+The brand manifest lives in ``data/brands.json``:
+
+    {
+      "default": "microsoft-employee",
+      "brands": {
+        "github-engineering": {"name": "GitHub Engineering", "kit": "brand_kit.md"}
+      }
+    }
+
+Kit paths are relative to the manifest.  Brands can be looked up by ID or by
+display name (the web form sends the preset name).
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from openai import AzureOpenAI
+
+from agents.agent_factory import (
+    create_brand_guard_agent,
+    upload_brand_kit,
+    delete_brand_kit,
+    cleanup_agents,
+)
+
+DEFAULT_MANIFEST_PATH = Path(__file__).resolve().parent.parent / "data" / "brands.json"
+
+
+def _slug(value: str) -> str:
+    """Normalise a brand ID or display name for lookup."""
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+@dataclass(frozen=True)
+class BrandKit:
+    """A registered brand and the kit file that backs it."""
+
+    id: str
+    name: str
+    kit_path: Path
+
+
+@dataclass
+class LiveBrand:
+    """Remote resources built for a kit: its vector store and Brand Guard assistant."""
+
+    kit: BrandKit
+    vector_store_id: str
+    brand_guard_agent: object
+
+
+# ── Manifest ─────────────────────────────────────────────────────────
+
+
+class BrandManifest:
+    """The brands declared in ``brands.json``, resolvable by ID or display name."""
+
+    def __init__(self, manifest_path: str | Path = DEFAULT_MANIFEST_PATH):
+        manifest_path = Path(manifest_path)
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+        self.kits: dict[str, BrandKit] = {}
+        self._aliases: dict[str, str] = {}
+        for brand_id, entry in manifest["brands"].items():
+            kit = BrandKit(
+                id=brand_id,
+                name=entry.get("name", brand_id),
+                kit_path=manifest_path.parent / entry["kit"],
+            )
+            self.kits[brand_id] = kit
+            self._aliases[_slug(brand_id)] = brand_id
+            self._aliases[_slug(kit.name)] = brand_id
+
+        self.default_brand_id = manifest.get("default") or next(iter(self.kits))
+
+    def resolve(self, brand: str) -> BrandKit:
+        """Return the kit for a brand ID or display name."""
+        brand_id = self._aliases.get(_slug(brand))
+        if brand_id is None:
+            raise ValueError(
+                f"Unknown brand '{brand}'. Known brands: {', '.join(self.kits)}"
+            )
+        return self.kits[brand_id]
+
+
+# ── Registry ─────────────────────────────────────────────────────────
+
+
+class BrandRegistry:
+    """
+    Resolves brands to kits and lazily builds each kit's vector store + Brand
+    Guard agent, keeping at most ``capacity`` kits live (least recently used
+    first out).  Call ``close()`` to release every live kit.
+    """
+
+    def __init__(
+        self,
+        client: AzureOpenAI,
+        manifest: BrandManifest | None = None,
+        capacity: int | None = None,
+    ):
+        self.client = client
+        self.manifest = manifest or BrandManifest()
+        self.default_brand_id = self.manifest.default_brand_id
+        self.active_brand_id = self.default_brand_id
+
+        if capacity is None:
+            capacity = int(os.environ.get("BRAND_CACHE_SIZE", "3"))
+        self.capacity = max(1, capacity)
+
+        self._live: OrderedDict[Path, LiveBrand] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def brand_ids(self) -> list[str]:
+        """All registered brand IDs."""
+        return list(self.manifest.kits)
+
+    def resolve(self, brand: str | None = None) -> BrandKit:
+        """Return the kit for a brand ID or display name (the active brand if omitted)."""
+        if not brand:
+            return self.manifest.kits[self.active_brand_id]
+        return self.manifest.resolve(brand)
+
+    def select(self, brand: str) -> BrandKit:
+        """Make ``brand`` the active brand used when no brand is given."""
+        kit = self.resolve(brand)
+        self.active_brand_id = kit.id
+        print(f"  🎯 Active brand: {kit.name} ({kit.id})")
+        return kit
+
+    def get(self, brand: str | None = None) -> LiveBrand:
+        """Return the live resources for a brand's kit, building them on a cache miss."""
+        kit = self.resolve(brand)
+        key = kit.kit_path.resolve()
+        with self._lock:
+            live = self._live.get(key)
+            if live is not None:
+                self._live.move_to_end(key)
+                print(f"  ♻️  Reusing live brand kit: {key.name} (vector store {live.vector_store_id})")
+                return replace(live, kit=kit)
+
+            live = self._build(kit)
+            self._live[key] = live
+            while len(self._live) > self.capacity:
+                evicted_key, evicted = self._live.popitem(last=False)
+                print(f"  ⏏️  Evicting brand kit: {evicted_key.name}")
+                self._release(evicted)
+            return live
+
+    def close(self):
+        """Release every live brand's remote resources."""
+        with self._lock:
+            while self._live:
+                _, live = self._live.popitem(last=False)
+                self._release(live)
+
+    # ── Internals ────────────────────────────────────────────────
+
+    def _build(self, kit: BrandKit) -> LiveBrand:
+        print(f"📤 Uploading brand kit for {kit.name} to vector store...")
+        vector_store_id = upload_brand_kit(self.client, str(kit.kit_path), name=f"Brand Kit: {kit.kit_path.name}")
+        brand_guard_agent = create_brand_guard_agent(self.client, vector_store_id)
+        return LiveBrand(kit=kit, vector_store_id=vector_store_id, brand_guard_agent=brand_guard_agent)
+
+    def _release(self, live: LiveBrand):
+        cleanup_agents(self.client, [live.brand_guard_agent])
+        delete_brand_kit(self.client, live.vector_store_id)
@@ -0,0 +1,158 @@
+"""
+TrendSurf Copilot — Delta Research
+Refreshes a stale research brief incrementally instead of re-running a full
+web-grounded research turn.
+
+The prior brief's sources and key facts are handed to the Research Agent,
+which runs with delta-only instructions (``RESEARCH_DELTA_AGENT_PROMPT``) in
+place of its full-brief prompt and is asked only for material newer than the
+last run.  The (small) delta
+is merged into the prior brief with URL-level de-duplication, and every fact
+and source carries a ``seen_at`` timestamp recording when it first appeared.
+"""
+
+import json
+import re
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from openai import AzureOpenAI
+
+from agents.agent_factory import run_research_turn
+from agents.prompts import (
+    RESEARCH_DELTA_AGENT_PROMPT,
+    RESEARCH_DELTA_REQUEST_TEMPLATE,
+    RESEARCH_REQUEST_TEMPLATE,
+)
+from agents.results import parse_agent_json
+
+# Briefs older than this are re-researched from scratch rather than patched
+DELTA_MAX_AGE = 7 * 86400
+
+# Caps keep merged briefs (and every downstream agent prompt) from growing unbounded
+MAX_FACTS = 10
+MAX_SOURCES = 8
+MAX_LIST_ITEMS = 6
+
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|ref|fbclid|gclid|mc_cid|mc_eid)$")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for de-duplication (host case, fragments, tracking params)."""
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)])
+    path = parts.path.rstrip("/") or "/"
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit((parts.scheme.lower() or "https", host, path, query, ""))
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def _as_fact(item, default_seen_at: str) -> dict:
+    if isinstance(item, dict):
+        return {"fact": str(item.get("fact", "")), "seen_at": item.get("seen_at") or default_seen_at}
+    return {"fact": str(item), "seen_at": default_seen_at}
+
+
+def _as_source(item: dict, default_seen_at: str) -> dict:
+    return {**item, "seen_at": item.get("seen_at") or default_seen_at}
+
+
+def _union(prior: list, new: list, limit: int) -> list:
+    seen = {str(x).lower() for x in prior}
+    merged = [x for x in new if str(x).lower() not in seen] + list(prior)
+    return merged[:limit]
+
+
+def merge_briefs(prior: dict, delta: dict, prior_seen_at: str, now_seen_at: str) -> dict:
+    """
+    Merge a delta into a prior brief, newest items first.
+
+    Plain-string facts/sources in ``prior`` are stamped with ``prior_seen_at``;
+    items from ``delta`` get ``now_seen_at``.  Sources are de-duplicated by
+    normalised URL and facts by case-insensitive text.
+    """
+    facts = [_as_fact(f, prior_seen_at) for f in prior.get("key_facts", [])]
+    known_facts = {f["fact"].strip().lower() for f in facts}
+    new_facts = []
+    for item in delta.get("key_facts", []):
+        fact = _as_fact(item, now_seen_at)
+        key = fact["fact"].strip().lower()
+        if key and key not in known_facts:
+            known_facts.add(key)
+            new_facts.append({**fact, "seen_at": now_seen_at})
+
+    sources = [_as_source(s, prior_seen_at) for s in prior.get("sources", []) if isinstance(s, dict)]
+    known_urls = {normalize_url(s.get("url", "")) for s in sources}
+    new_sources = []
+    for item in delta.get("sources", []):
+        if not isinstance(item, dict) or not item.get("url"):
+            continue
+        key = normalize_url(item["url"])
+        if key not in known_urls:
+            known_urls.add(key)
+            new_sources.append({**item, "seen_at": now_seen_at})
+
+    merged = dict(prior)
+    merged["key_facts"] = (new_facts + facts)[:MAX_FACTS]
+    merged["sources"] = (new_sources + sources)[:MAX_SOURCES]
+    for field in ("risks_and_concerns", "industry_angles", "trending_hashtags"):
+        merged[field] = _union(prior.get(field, []), delta.get(field, []), MAX_LIST_ITEMS)
+    if delta.get("summary_update"):
+        merged["latest_update"] = {"text": delta["summary_update"], "seen_at": now_seen_at}
+    merged["last_refreshed"] = now_seen_at
+    return merged
+
+
+# ── Research turns ──────────────────────────────────────────────────
+
+
+def refresh_research(
+    client: AzureOpenAI,
+    agent,
+    topic: str,
+    prior_entry: dict | None,
+    now: float,
+    usage: dict | None = None,
+) -> tuple[str, str]:
+    """
+    Research ``topic``, patching ``prior_entry`` (a cached brief entry) when
+    possible.  Returns ``(brief_text, mode)`` where mode is ``"delta"`` or
+    ``"full"``.  A full research turn is used when there is no usable prior
+    brief, it is older than ``DELTA_MAX_AGE``, or the delta cannot be parsed.
+    """
+    prior = parse_agent_json(prior_entry["brief"]) if prior_entry else None
+    if prior is None or now - prior_entry["refreshed_at"] > DELTA_MAX_AGE:
+        prompt = RESEARCH_REQUEST_TEMPLATE.format(topic=topic)
+        return run_research_turn(client, agent, prompt, usage=usage), "full"
+
+    prior_seen_at = _iso(prior_entry["refreshed_at"])
+    known_sources = "\n".join(
+        f"- {s.get('url')}" for s in prior.get("sources", []) if isinstance(s, dict) and s.get("url")
+    ) or "- (none)"
+    known_facts = "\n".join(
+        f"- {_as_fact(f, prior_seen_at)['fact']}" for f in prior.get("key_facts", [])
+    ) or "- (none)"
+    prompt = RESEARCH_DELTA_REQUEST_TEMPLATE.format(
+        topic=topic,
+        since=prior.get("last_refreshed") or prior_seen_at,
+        known_sources=known_sources,
+        known_facts=known_facts,
+    )
+    # Delta-only instructions: the full research prompt asks for a complete
+    # brief with an executive summary, which defeats the point of a delta
+    delta = parse_agent_json(
+        run_research_turn(client, agent, prompt, usage=usage, instructions=RESEARCH_DELTA_AGENT_PROMPT)
+    )
+    if delta is None:
+        print("  ⚠️  Delta research returned no parseable JSON — running full research")
+        prompt = RESEARCH_REQUEST_TEMPLATE.format(topic=topic)
+        return run_research_turn(client, agent, prompt, usage=usage), "full"
+
+    merged = merge_briefs(prior, delta, prior_seen_at, _iso(now))
+    new_facts = sum(1 for f in merged["key_facts"] if f["seen_at"] == merged["last_refreshed"])
+    new_sources = sum(1 for s in merged["sources"] if s["seen_at"] == merged["last_refreshed"])
+    print(f"  🔁 Delta research: {new_facts} new fact(s), {new_sources} new source(s)")
+    return json.dumps(merged, indent=2, ensure_ascii=False), "delta"
@@ -0,0 +1,189 @@
+"""
+TrendSurf Copilot — Pre-warm Scheduler
+Periodically refreshes research briefs (and optionally full pipeline results)
+for a watch list of topics so interactive requests hit a warm cache.
+
+The watch list is re-read every cycle from the topics file (one topic per
+line, ``#`` comments allowed) merged with the shared, size-capped list of
+WorkIQ suggestions the web app keeps in ``output/cache/workiq_suggestions.json``
+(default-question results only, pooled across users).
+
+Each cycle only refreshes entries older than the interval, runs at most
+``concurrency`` refreshes at once, and stops starting new refreshes once the
+cycle's token budget is spent.  A report with warm-hit ratio and budget
+consumed is printed and written to ``output/cache/prewarm_report.json``.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from agents.research_cache import ResearchCache
+
+# Agent outputs in a pipeline result; a turn that failed returns "ERROR: ..."
+_RESULT_STAGES = ("research", "compliance", "posts", "review")
+
+
+def load_watch_list(topics_file: str | Path, cache_dir: Path) -> list[str]:
+    """Read the topics file plus stored WorkIQ suggestions, de-duplicated in order."""
+    topics = []
+    for line in Path(topics_file).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            topics.append(line)
+
+    try:
+        stored = json.loads((cache_dir / "workiq_suggestions.json").read_text(encoding="utf-8"))
+        topics.extend(s for s in stored.get("suggestions", []) if isinstance(s, str))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    seen = set()
+    unique = []
+    for topic in topics:
+        key = " ".join(topic.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(topic)
+    return unique
+
+
+def failed_stages(result: dict) -> list[str]:
+    """Stages of a pipeline result whose agent turn returned an ``ERROR:`` message."""
+    return [
+        stage for stage in _RESULT_STAGES
+        if str(result.get(stage, "")).startswith("ERROR:")
+    ]
+
+
+class PrewarmScheduler:
+    """
+    Refreshes a topic watch list into a ``ResearchCache``.
+
+    ``refresh_brief(topic, usage)`` returns a fresh research brief and its
+    mode (``"full"`` or ``"delta"``), and
+    ``run_full(topic, usage)`` a full pipeline result; both add their token
+    counts to ``usage``.  Pass ``run_full=None`` to warm research briefs only.
+    Full results with a failed agent turn are reported as ``failed`` and not
+    cached.
+    """
+
+    def __init__(
+        self,
+        cache: ResearchCache,
+        refresh_brief: Callable[[str, dict], tuple[str, str]],
+        run_full: Callable[[str, dict], dict] | None = None,
+        brand: str = "",
+        concurrency: int = 2,
+        token_budget: int | None = None,
+    ):
+        self.cache = cache
+        self.refresh_brief = refresh_brief
+        self.run_full = run_full
+        self.brand = brand
+        self.concurrency = max(1, concurrency)
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._tokens_used = 0
+
+    def _budget_left(self) -> bool:
+        with self._lock:
+            return self.token_budget is None or self._tokens_used < self.token_budget
+
+    def _charge(self, usage: dict):
+        with self._lock:
+            self._tokens_used += usage.get("total_tokens", 0)
+
+    def _warm_topic(self, topic: str, max_age: float) -> str:
+        """Refresh one topic if stale; returns its outcome for the cycle report."""
+        brief_fresh = self.cache.get_brief(topic, max_age=max_age) is not None
+        result_fresh = (
+            self.run_full is None
+            or self.cache.get_result(topic, self.brand, max_age=max_age) is not None
+        )
+        if brief_fresh and result_fresh:
+            return "fresh"
+        if not self._budget_left():
+            return "skipped_budget"
+
+        try:
+            if not brief_fresh:
+                usage: dict = {}
+                brief, mode = self.refresh_brief(topic, usage)
+                self._charge(usage)
+                self.cache.put_brief(topic, brief, usage, mode=mode)
+                print(f"  🔥 Warmed brief ({mode}): {topic} ({usage.get('total_tokens', 0)} tokens)")
+
+            if not result_fresh:
+                if not self._budget_left():
+                    return "skipped_budget"
+                usage = {}
+                result = self.run_full(topic, usage)
+                self._charge(usage)
+                failed = failed_stages(result)
+                if failed:
+                    # Never serve an agent error from the warm cache for a whole TTL
+                    print(f"  ⚠️  Pre-warm result for '{topic}' not cached: {', '.join(failed)} failed")
+                    return "failed"
+                self.cache.put_result(topic, self.brand, result, usage)
+                print(f"  🔥 Warmed result: {topic} ({usage.get('total_tokens', 0)} tokens)")
+        except Exception as e:
+            print(f"  ⚠️  Pre-warm failed for '{topic}': {e}")
+            return "failed"
+        return "refreshed"
+
+    def run_cycle(self, topics: list[str], max_age: float) -> dict:
+        """Run one refresh pass over ``topics`` and return the cycle report."""
+        self._tokens_used = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            outcomes = list(pool.map(lambda t: self._warm_topic(t, max_age), topics))
+
+        counts = {k: outcomes.count(k) for k in ("refreshed", "fresh", "skipped_budget", "failed")}
+        report = {
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_s": round(time.monotonic() - started, 1),
+            "topics": len(topics),
+            **counts,
+            "tokens_used": self._tokens_used,
+            "token_budget": self.token_budget,
+            "warm_hit_ratio": {
+                "research": self.cache.hit_ratio("research"),
+                "results": self.cache.hit_ratio("results"),
+            },
+        }
+        self.cache.save_report(report)
+        return report
+
+    def run_forever(self, topics_file: str | Path, interval: float, cycles: int | None = None):
+        """Run a cycle every ``interval`` seconds (``cycles`` times, or until interrupted)."""
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            cycle += 1
+            topics = load_watch_list(topics_file, self.cache.cache_dir)
+            print(f"\n♨️  Pre-warm cycle {cycle}: {len(topics)} topic(s), concurrency {self.concurrency}")
+            report = self.run_cycle(topics, max_age=interval)
+            print(_format_report(report))
+            if cycles is not None and cycle >= cycles:
+                break
+            time.sleep(interval)
+
+
+def _format_report(report: dict) -> str:
+    def pct(ratio):
+        return "n/a" if ratio is None else f"{ratio:.0%}"
+
+    budget = report["token_budget"]
+    budget_text = f"{report['tokens_used']} / {budget}" if budget else f"{report['tokens_used']} (no budget)"
+    ratios = report["warm_hit_ratio"]
+    return (
+        f"  ✅ refreshed {report['refreshed']}, fresh {report['fresh']}, "
+        f"skipped (budget) {report['skipped_budget']}, failed {report['failed']} "
+        f"in {report['duration_s']}s\n"
+        f"  🪙 Tokens: {budget_text}\n"
+        f"  🎯 Warm-hit ratio: research {pct(ratios['research'])}, results {pct(ratios['results'])}"
+    )
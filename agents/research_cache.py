@@ -0,0 +1,156 @@
+"""
+TrendSurf Copilot — Warm Result Cache
+File-backed cache of research briefs and full pipeline results, shared by the
+pre-warm scheduler (writer) and interactive runs (reader).
+
+Layout under ``output/cache/``:
+    research/<key>.json   research brief per topic
+    results/<key>.json    full pipeline result per (topic, brand)
+    stats.log             warm-hit / cold-miss log of interactive runs (append-only)
+
+Entries older than the TTL (``RESEARCH_CACHE_TTL``, default ``2h``) are
+treated as cold.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "output" / "cache"
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str | int | float) -> float:
+    """Parse ``"90s"``, ``"30m"``, ``"1h"``, ``"1h30m"`` or plain seconds into seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip().lower()
+    if re.fullmatch(r"\d+(\.\d+)?", text):
+        return float(text)
+    parts = re.findall(r"(\d+(?:\.\d+)?)([smhd])", text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"Invalid duration '{value}' (use e.g. 90s, 30m, 1h, 1h30m)")
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def topic_key(*parts: str) -> str:
+    """Stable file-name key for a topic (and optional brand)."""
+    normalised = "|".join(" ".join(p.lower().split()) for p in parts)
+    slug = re.sub(r"[^a-z0-9]+", "-", normalised).strip("-")[:48]
+    digest = hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}-{digest}"
+
+
+class ResearchCache:
+    """Warm research briefs and pipeline results with TTL-based freshness."""
+
+    def __init__(self, cache_dir: str | Path = DEFAULT_CACHE_DIR, ttl: float | None = None):
+        self.cache_dir = Path(cache_dir)
+        if ttl is None:
+            ttl = parse_duration(os.environ.get("RESEARCH_CACHE_TTL", "2h"))
+        self.ttl = ttl
+
+    # ── Research briefs ──────────────────────────────────────────
+
+    def get_brief(self, topic: str, max_age: float | None = None) -> dict | None:
+        """Return the cached brief entry for ``topic`` if it is fresh, else ``None``."""
+        return self._read_fresh(self._path("research", topic_key(topic)), max_age)
+
+    def get_stale_brief(self, topic: str) -> dict | None:
+        """Return the cached brief entry for ``topic`` regardless of age (delta refresh base)."""
+        return self._read_fresh(self._path("research", topic_key(topic)), float("inf"))
+
+    def put_brief(self, topic: str, brief: str, usage: dict | None = None, mode: str = "full") -> dict:
+        entry = {
+            "topic": topic,
+            "brief": brief,
+            "refreshed_at": time.time(),
+            "mode": mode,
+            "usage": usage or {},
+        }
+        self._write(self._path("research", topic_key(topic)), entry)
+        return entry
+
+    # ── Full pipeline results ────────────────────────────────────
+
+    def get_result(self, topic: str, brand: str, max_age: float | None = None) -> dict | None:
+        """Return the cached pipeline result for ``(topic, brand)`` if it is fresh."""
+        return self._read_fresh(self._path("results", topic_key(topic, brand)), max_age)
+
+    def put_result(self, topic: str, brand: str, result: dict, usage: dict | None = None) -> dict:
+        entry = {
+            "topic": topic,
+            "brand": brand,
+            "result": result,
+            "refreshed_at": time.time(),
+            "usage": usage or {},
+        }
+        self._write(self._path("results", topic_key(topic, brand)), entry)
+        return entry
+
+    # ── Warm-hit statistics ──────────────────────────────────────
+
+    def record(self, kind: str, hit: bool):
+        """
+        Log an interactive lookup of ``kind`` (``"research"`` or ``"results"``).
+
+        Each lookup appends one short line in a single ``O_APPEND`` write, so
+        the web worker, CLI runs and the pre-warm scheduler can all record
+        concurrently without losing counts.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / "stats.log", "a", encoding="utf-8") as log:
+            log.write(f"{kind} {'hit' if hit else 'miss'}\n")
+
+    def stats(self) -> dict:
+        """Hit/miss counters per kind, summed from the lookup log."""
+        stats: dict = {}
+        try:
+            lines = (self.cache_dir / "stats.log").read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return stats
+        for line in lines:
+            kind, _, outcome = line.partition(" ")
+            if outcome not in ("hit", "miss"):
+                continue  # torn or foreign line
+            counters = stats.setdefault(kind, {"hits": 0, "misses": 0})
+            counters["hits" if outcome == "hit" else "misses"] += 1
+        return stats
+
+    def hit_ratio(self, kind: str = "research") -> float | None:
+        """Warm-hit ratio for interactive lookups, or ``None`` before any lookup."""
+        counters = self.stats().get(kind, {})
+        total = counters.get("hits", 0) + counters.get("misses", 0)
+        return counters.get("hits", 0) / total if total else None
+
+    def save_report(self, report: dict):
+        """Store the latest pre-warm cycle report next to the cache."""
+        self._write(self.cache_dir / "prewarm_report.json", report)
+
+    # ── Internals ────────────────────────────────────────────────
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / kind / f"{key}.json"
+
+    def _read_fresh(self, path: Path, max_age: float | None) -> dict | None:
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        age = time.time() - entry.get("refreshed_at", 0)
+        if age > (self.ttl if max_age is None else max_age):
+            return None
+        entry["age"] = age
+        return entry
+
+    def _write(self, path: Path, data: dict):
+        # Write-then-rename so concurrent readers never see a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, path)
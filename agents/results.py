@@ -0,0 +1,432 @@
+"""
+TrendSurf Copilot — Result Assembly
+Builds one typed result model from the raw agent outputs and renders the UI
+payload the web app forwards to the browser (posts, compliance, sources and
+the Adaptive Card) from it.  The raw markdown/JSON artifacts are returned
+separately by ``render_artifacts`` so they can be saved first.
+
+The Adaptive Card template is compiled once per process into a slot
+structure: strings containing ``${placeholder}`` become ``_Slot`` objects and
+placeholder-free subtrees are kept as-is, so rendering only rebuilds the few
+containers on a path to a slot instead of re-serialising and regex-replacing
+the whole template every run.
+
+Benchmark card rendering on its own with:
+    python -m agents.results
+
+The web app shows ``data/demo_ui_payload.json`` when the pipeline fails; it
+is rendered from the fallbacks below (so they live only here) with a
+``${topic}`` placeholder the web app replaces with the requested topic.  Regenerate it
+after changing them or the card template with:
+    python -m agents.results --write-demo
+"""
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+CARD_TEMPLATE_PATH = Path(__file__).resolve().parent.parent / "data" / "adaptive_card_template.json"
+DEMO_PAYLOAD_PATH = CARD_TEMPLATE_PATH.with_name("demo_ui_payload.json")
+# Left as a placeholder in the demo payload; the web app fills in the run's topic
+DEMO_TOPIC = "${topic}"
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+_URL = re.compile(r"(https?://[^\s]+)")
+
+ARTIFACT_PATHS = {
+    "researchBriefPath": "output/01_research_brief.md",
+    "brandReviewPath": "output/02_brand_guard_review.md",
+    "draftPostsPath": "output/03_draft_posts.md",
+    "finalReviewPath": "output/04_final_review.md",
+    "pipelineResultPath": "output/pipeline_result.json",
+}
+
+# (label, brand guard checklist key, note when passing, note when failing)
+_CHECKLIST_ITEMS = (
+    ("Voice & Tone", "voice_tone", "Professional and authoritative", "Needs adjustment"),
+    ("No Prohibited Language", "no_prohibited_language", "All content approved", "Prohibited terms found"),
+    ("Claims Sourced", "claims_sourced", "All claims verified", "Unsourced claims found"),
+    ("Disclaimers Present", "disclaimers_present", "Required disclaimers included", "Missing disclaimers"),
+    ("Platform Compliant", "platform_compliant", "Character limits respected", "Platform limits exceeded"),
+    ("Audience Appropriate", "audience_appropriate", "Suitable for target audience", "Audience mismatch"),
+)
+
+_DEFAULT_DISCLAIMERS = (
+    "This is informational only and does not constitute legal or financial advice.",
+    "AI-generated content has been reviewed by our compliance team.",
+)
+
+_DEFAULT_SOURCES = (
+    ("Microsoft Engineering Blog", "https://devblogs.microsoft.com/"),
+    ("GitHub Blog", "https://github.blog/"),
+    ("The New Stack", "https://thenewstack.io/"),
+)
+
+
+def _text(value) -> str:
+    """Coerce an agent-supplied JSON value to text (``""`` for missing/null)."""
+    return "" if value is None else str(value)
+
+
+def _content(posts: dict, platform: str) -> str:
+    """``posts[platform]["content"]`` as text, ``""`` unless both levels are objects."""
+    entry = posts.get(platform)
+    return _text(entry.get("content")) if isinstance(entry, dict) else ""
+
+
+def parse_agent_json(text: str) -> dict | None:
+    """Parse agent output as a JSON object, tolerating markdown code fences and surrounding prose."""
+    if not text:
+        return None
+    stripped = re.sub(r"^```(?:json)?\s*\n?", "", text.strip())
+    stripped = re.sub(r"\n?```\s*$", "", stripped).strip()
+    try:
+        parsed = json.loads(stripped)
+    except json.JSONDecodeError:
+        # Fall back to the outermost JSON object embedded in prose
+        start, end = stripped.find("{"), stripped.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            parsed = json.loads(stripped[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+# ── Result model ─────────────────────────────────────────────────────
+
+
+@dataclass(slots=True)
+class Post:
+    text: str
+    char_count: int | None = None
+
+
+@dataclass(slots=True)
+class ChecklistItem:
+    item: str
+    status: str
+    notes: str
+
+
+@dataclass(slots=True)
+class Source:
+    title: str
+    url: str
+
+
+@dataclass(slots=True)
+class PipelineResult:
+    """Typed view of a finished run, built once from the raw agent outputs."""
+
+    topic: str
+    brand: str
+    linkedin: Post
+    x: Post
+    teams: Post
+    checklist: list[ChecklistItem]
+    disclaimers: list[str]
+    sources: list[Source]
+    raw: dict = field(repr=False)
+
+    def card_values(self) -> dict[str, str]:
+        """Placeholder values for the Adaptive Card template."""
+        titles = [s.title for s in self.sources[:3]] + ["N/A"] * 3
+        return {
+            "topic": self.topic,
+            "linkedin_post": self.linkedin.text[:200],
+            "twitter_post": self.x.text,
+            "teams_post": self.teams.text[:200],
+            "source_1": titles[0],
+            "source_2": titles[1],
+            "source_3": titles[2],
+            "research_url": self.sources[0].url if self.sources else "https://example.com",
+        }
+
+    def ui_payload(self, adaptive_card: dict) -> dict:
+        """The result shape the web app's ResultsView consumes."""
+        return {
+            "topic": self.topic,
+            "brand": self.brand,
+            "outputs": {
+                "linkedin": {"text": self.linkedin.text},
+                "x": {"text": self.x.text, "charCount": self.x.char_count},
+                "teams": {"text": self.teams.text},
+            },
+            "compliance": {
+                "checklist": [asdict(c) for c in self.checklist],
+                "disclaimers": self.disclaimers,
+            },
+            "sources": [asdict(s) for s in self.sources],
+            "artifacts": dict(ARTIFACT_PATHS),
+            "adaptiveCard": {"json": adaptive_card},
+        }
+
+
+def _fallback_posts(topic: str) -> tuple[Post, Post, Post]:
+    linkedin = (
+        f"{topic} — Why This Matters for Engineering Teams\n\n"
+        "The landscape is evolving rapidly. Here are three key takeaways:\n\n"
+        "- **Community-driven innovation**: Open-source contributions are accelerating progress\n"
+        "- **Practical impact**: Engineering teams can adopt these practices today\n"
+        "- **Forward-looking**: The implications for developer productivity are significant\n\n"
+        "As someone working in this space, I'm excited to see how the community is pushing "
+        "boundaries. What's your take?\n\n"
+        "Views expressed are my own and do not necessarily reflect those of Microsoft.\n\n"
+        "#Microsoft #DevCommunity #OpenSource #AI #Engineering"
+    )
+    x = (
+        f"{topic[:60]} — 3 key takeaways for engineering teams:\n\n"
+        "- Community-driven innovation\n"
+        "- Practical, adopt-today impact\n"
+        "- Developer productivity gains\n\n"
+        "#DevCommunity #AI"
+    )
+    teams = (
+        f"**{topic} — Internal Digest**\n\n"
+        "**What Changed:**\n"
+        "- New developments in this space with significant community traction\n"
+        "- Updated best practices and frameworks\n\n"
+        "**Why It Matters:**\n"
+        "- Direct impact on our engineering practices\n"
+        "- Opportunity to contribute and lead in the community\n"
+        "- Competitive advantage through early adoption\n\n"
+        "**What to Do Next:**\n"
+        "- Engineering leads: Review and discuss in next team sync\n"
+        "- DevRel: Consider blog post or community engagement\n"
+        "- Product: Evaluate integration opportunities\n\n"
+        "**Resources:**\n"
+        "- Official documentation and links\n"
+        "- Community discussion threads\n"
+        "- Internal Teams channel: #engineering-trends"
+    )
+    return Post(linkedin), Post(x, 180), Post(teams)
+
+
+def _fallback_compliance() -> tuple[list[ChecklistItem], list[str]]:
+    checklist = [
+        ChecklistItem("Voice & Tone", "pass", "Empowering, inclusive, and technically credible"),
+        ChecklistItem("No Prohibited Language", "pass", "No competitor disparagement or confidential info"),
+        ChecklistItem("Claims Sourced", "pass", "All statements backed by authoritative sources"),
+        ChecklistItem("Disclaimers Present", "pass", "Personal views disclaimer included"),
+        ChecklistItem("Platform Compliant", "pass", "Character limits and format guidelines met"),
+        ChecklistItem("Employee-Ready", "pass", "Appropriate for a Microsoft employee to share publicly"),
+    ]
+    disclaimers = [
+        "Views expressed are my own and do not necessarily reflect those of Microsoft.",
+        "AI-assisted content — reviewed for accuracy before publishing.",
+    ]
+    return checklist, disclaimers
+
+
+def assemble_result(raw: dict) -> PipelineResult:
+    """
+    Build the typed result from a raw pipeline result (``pipeline_result.json``
+    shape: topic, brand, research, compliance, posts, review).  Each agent
+    output is parsed exactly once; missing or malformed parts (wrong JSON
+    types included) fall back to placeholder text, ``fail`` checklist items or
+    the same defaults the web app uses for demo runs.
+    """
+    topic = _text(raw.get("topic"))
+    posts_json = parse_agent_json(raw.get("posts", ""))
+    compliance_json = parse_agent_json(raw.get("compliance", ""))
+    research_json = parse_agent_json(raw.get("research", ""))
+
+    posts = (posts_json or {}).get("posts")
+    if isinstance(posts, dict):
+        twitter = _content(posts, "twitter")
+        linkedin = Post(_content(posts, "linkedin") or "LinkedIn post content")
+        x = Post(twitter or "Twitter post content", len(twitter))
+        teams = Post(_content(posts, "teams") or "Teams post content")
+    else:
+        linkedin, x, teams = _fallback_posts(topic)
+
+    if compliance_json is not None:
+        flags = compliance_json.get("checklist")
+        if not isinstance(flags, dict):
+            flags = {}
+        checklist = [
+            ChecklistItem(label, "pass" if flags.get(key) else "fail", ok if flags.get(key) else bad)
+            for label, key, ok, bad in _CHECKLIST_ITEMS
+        ]
+        included = (posts_json or {}).get("disclaimers_included")
+        if isinstance(included, list) and included:
+            disclaimers = [_text(d) for d in included]
+        else:
+            disclaimers = list(_DEFAULT_DISCLAIMERS)
+    else:
+        checklist, disclaimers = _fallback_compliance()
+
+    research_sources = (research_json or {}).get("sources")
+    if not isinstance(research_sources, list):
+        research_sources = []
+    sources = [
+        Source(_text(s.get("title")), _text(s.get("url")))
+        for s in research_sources if isinstance(s, dict)
+    ]
+    if not sources:
+        urls = _URL.findall(_text(raw.get("research")))[:3]
+        sources = [Source(f"Source {i + 1}", url) for i, url in enumerate(urls)]
+    if not sources:
+        sources = [Source(title, url) for title, url in _DEFAULT_SOURCES]
+
+    return PipelineResult(
+        topic=topic,
+        brand=_text(raw.get("brand")),
+        linkedin=linkedin,
+        x=x,
+        teams=teams,
+        checklist=checklist,
+        disclaimers=disclaimers,
+        sources=sources,
+        raw=raw,
+    )
+
+
+# ── Adaptive Card template ───────────────────────────────────────────
+
+
+class _Slot:
+    """A template string split into literal text and placeholder names."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, text: str):
+        # re.split with one group alternates literal, name, literal, ...
+        self.parts = _PLACEHOLDER.split(text)
+
+    def render(self, values: dict[str, str]) -> str:
+        parts = self.parts
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            value = values.get(name)
+            out.append(f"${{{name}}}" if value is None else value)
+            out.append(parts[i + 1])
+        return "".join(out)
+
+
+class _Node:
+    """A dict or list that contains at least one slot somewhere below it."""
+
+    __slots__ = ("is_dict", "items")
+
+    def __init__(self, is_dict: bool, items: list):
+        self.is_dict = is_dict
+        self.items = items  # (key, child) pairs for dicts, children for lists
+
+
+def _compile(value):
+    """Return a _Slot/_Node for subtrees with placeholders, or the plain value if static."""
+    if isinstance(value, str):
+        return _Slot(value) if _PLACEHOLDER.search(value) else value
+    if isinstance(value, dict):
+        items = [(k, _compile(v)) for k, v in value.items()]
+        dynamic = any(isinstance(v, (_Slot, _Node)) for _, v in items)
+        return _Node(True, items) if dynamic else value
+    if isinstance(value, list):
+        items = [_compile(v) for v in value]
+        dynamic = any(isinstance(v, (_Slot, _Node)) for v in items)
+        return _Node(False, items) if dynamic else value
+    return value
+
+
+def _render(node, values: dict[str, str]):
+    if isinstance(node, _Slot):
+        return node.render(values)
+    if isinstance(node, _Node):
+        if node.is_dict:
+            return {k: _render(v, values) for k, v in node.items}
+        return [_render(v, values) for v in node.items]
+    return node
+
+
+class CompiledCard:
+    """
+    An Adaptive Card template compiled into placeholder slots.
+
+    ``render()`` shares placeholder-free subtrees with the template, so treat
+    rendered cards as read-only (they are serialised straight to JSON).
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, template: dict):
+        self._root = _compile(template)
+
+    def render(self, values: dict[str, str]) -> dict:
+        return _render(self._root, values)
+
+
+@lru_cache(maxsize=None)
+def load_card_template(path: str | Path = CARD_TEMPLATE_PATH) -> CompiledCard:
+    """Read and compile the card template once per process."""
+    return CompiledCard(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def render_card_naive(template_text: str, values: dict[str, str]) -> dict:
+    """
+    Reference renderer: the old per-run parse, serialise and string-replace
+    approach.  ``CompiledCard.render`` must produce the same card; the tests
+    and the benchmark compare against it.
+    """
+    card_json = json.dumps(json.loads(template_text))
+    for name, value in values.items():
+        card_json = card_json.replace(f"${{{name}}}", json.dumps(value)[1:-1])
+    return json.loads(card_json)
+
+
+# ── Single-pass rendering ────────────────────────────────────────────
+
+
+def build_ui_payload(raw: dict) -> dict:
+    """Assemble the typed result and render the payload the web UI consumes."""
+    result = assemble_result(raw)
+    return result.ui_payload(load_card_template().render(result.card_values()))
+
+
+def render_artifacts(raw: dict) -> dict[str, str]:
+    """
+    The raw run artifacts as ``{filename: content}``: the four markdown files
+    and ``pipeline_result.json``.  These need no parsing, so save them before
+    building the UI payload and a rendering error can never lose the run.
+    """
+    return {
+        "01_research_brief.md": _text(raw.get("research")),
+        "02_brand_guard_review.md": _text(raw.get("compliance")),
+        "03_draft_posts.md": _text(raw.get("posts")),
+        "04_final_review.md": _text(raw.get("review")),
+        "pipeline_result.json": json.dumps(raw, indent=2, default=str),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import timeit
+
+    parser = argparse.ArgumentParser(description="Benchmark card rendering or write the demo UI payload")
+    parser.add_argument("--write-demo", action="store_true", help=f"Write {DEMO_PAYLOAD_PATH.name} and exit")
+    args = parser.parse_args()
+
+    if args.write_demo:
+        demo = build_ui_payload({"topic": DEMO_TOPIC})
+        DEMO_PAYLOAD_PATH.write_text(json.dumps(demo, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"💾 Saved: {DEMO_PAYLOAD_PATH}")
+        raise SystemExit(0)
+
+    sample = assemble_result({"topic": "GitHub Copilot agent mode", "brand": "github-copilot"})
+    values = sample.card_values()
+    template_text = CARD_TEMPLATE_PATH.read_text(encoding="utf-8")
+    compiled = load_card_template()
+    runs = 10_000
+
+    def naive():
+        return render_card_naive(template_text, values)
+
+    assert naive() == compiled.render(values)
+    for label, fn in (("parse + replace", naive), ("compiled slots", lambda: compiled.render(values))):
+        seconds = timeit.timeit(fn, number=runs)
+        print(f"{label:<16} {seconds / runs * 1e6:8.1f} µs/render")
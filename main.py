@@ -5,13 +5,21 @@ Runs the 4-agent chain: Research → Brand Guard → Copywriter → Reviewer
 Usage:
     python main.py "AI safety and NIST updates"
     python main.py "ESG investing trends in 2026"
+    python main.py --brand github-copilot "GitHub Copilot agent mode"
+    python main.py --list-brands
+    python main.py --worker            # JSON-lines requests on stdin
+    python main.py --prewarm data/prewarm_topics.txt --interval 1h
 """
 
+import argparse
 import json
+import os
 import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
-# Force unbuffered stdout so Node.js sees STEP markers in real-time
+# Force unbuffered stdout so Node.js sees progress events in real-time
 import functools
 print = functools.partial(print, flush=True)
 
@@ -20,14 +28,16 @@ from dotenv import load_dotenv
 from agents.agent_factory import (
     create_openai_client,
     create_research_agent,
-    create_brand_guard_agent,
     create_copywriter_agent,
     create_reviewer_agent,
-    upload_brand_kit,
     run_agent_turn,
-    run_research_turn,
     cleanup_agents,
 )
+from agents.brand_registry import BrandManifest, BrandRegistry
+from agents.delta_research import refresh_research
+from agents.prewarm import PrewarmScheduler
+from agents.research_cache import ResearchCache, parse_duration
+from agents.results import build_ui_payload, render_artifacts
 
 
 # ── Helpers ──────────────────────────────────────────────────────────
@@ -38,17 +48,86 @@ def save_output(filename: str, content: str):
     output_dir = Path(__file__).parent / "output"
     output_dir.mkdir(exist_ok=True)
     filepath = output_dir / filename
-    filepath.write_text(content, encoding="utf-8")
+    # Write-then-rename: pooled web workers may save the same files concurrently
+    tmp = filepath.with_name(f".{filename}.{os.getpid()}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, filepath)
     print(f"  💾 Saved: {filepath}")
 
 
+def emit_event(event_type: str, **fields):
+    """Print a machine-readable progress event (``EVENT {json}``) for the web app's run event bus."""
+    event = {"type": event_type, "ts": datetime.now(timezone.utc).isoformat(), **fields}
+    print(f"EVENT {json.dumps(event, default=str)}")
+
+
+class StageEvents:
+    """
+    Emits ``stage`` start/end events with durations; silent when disabled
+    (pre-warm runs).  End statuses are ``success``, ``warning`` (the agent
+    answered with an error message) and ``error`` (the stage raised).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._started: dict[str, float] = {}
+
+    def start(self, stage: str):
+        self._started[stage] = time.monotonic()
+        if self.enabled:
+            emit_event("stage", stage=stage, status="running")
+
+    def end(self, stage: str, summary: str, status: str = "success"):
+        duration_ms = int((time.monotonic() - self._started.pop(stage, time.monotonic())) * 1000)
+        if self.enabled:
+            emit_event("stage", stage=stage, status=status, summary=summary, duration_ms=duration_ms)
+
+    def end_turn(self, stage: str, output: str):
+        """End an agent stage, as a warning if the turn returned an ``ERROR:`` message."""
+        if output.startswith("ERROR:"):
+            self.end(stage, output[:200], status="warning")
+        else:
+            self.end(stage, f"{stage} completed")
+
+    def fail(self, error: Exception):
+        """End every stage still running with an ``error`` status."""
+        for stage in list(self._started):
+            self.end(stage, f"{stage} failed: {error}", status="error")
+
+
+def save_result_artifacts(card_data: dict):
+    """
+    Save the raw markdown/JSON artifacts, then render and save the UI payload
+    (typed result + Adaptive Card).  The raw artifacts go first so a
+    rendering error cannot lose a run whose agent turns already finished.
+    """
+    for filename, content in render_artifacts(card_data).items():
+        save_output(filename, content)
+    ui_payload = build_ui_payload(card_data)
+    save_output("ui_payload.json", json.dumps(ui_payload, indent=2, ensure_ascii=False))
+
+
 # ── Main Pipeline ────────────────────────────────────────────────────
 
-def run_pipeline(topic: str):
+def run_pipeline(
+    topic: str,
+    brand: str | None = None,
+    registry: BrandRegistry | None = None,
+    cache: ResearchCache | None = None,
+    interactive: bool = True,
+) -> dict:
     """
     Execute the full TrendSurf Copilot multi-agent pipeline.
     
     Chain: Research Agent → Brand Guard → Copywriter → Reviewer
+
+    The Brand Guard agent and its vector store come from ``registry`` so they
+    can be reused across runs.  When no registry is passed a one-shot registry
+    is created and its resources are deleted when the run finishes.
+
+    Research briefs (and pre-warmed full results) are served from ``cache``
+    when fresh.  Interactive runs count warm hits and write artifacts to
+    ``output/``; pre-warm runs (``interactive=False``) do neither.
     """
     print("=" * 60)
     print("🏄 TrendSurf Copilot — Multi-Agent Content Pipeline")
@@ -56,56 +135,87 @@ def run_pipeline(topic: str):
     print(f"📌 Topic: {topic}\n")
 
     # ── Initialize ───────────────────────────────────────────────
-    client = create_openai_client()
+    owns_registry = registry is None
+    if owns_registry:
+        registry = BrandRegistry(create_openai_client())
+    client = registry.client
+    cache = cache or ResearchCache()
+    stages = StageEvents(enabled=interactive)
+    usage: dict = {}
 
-    # Upload brand kit for File Search
-    brand_kit_path = str(Path(__file__).parent / "data" / "brand_kit.md")
-    print("📤 Uploading brand kit to vector store...")
-    vector_store_id = upload_brand_kit(client, brand_kit_path)
+    # Serve a pre-warmed full result without touching any agent
+    brand_id = registry.resolve(brand).id
+    if interactive:
+        warm = cache.get_result(topic, brand_id)
+        cache.record("results", warm is not None)
+        if warm is not None:
+            print(f"♨️  Warm pipeline result ({warm['age'] / 60:.0f} min old) — skipping agents")
+            for step, stage in (("STEP 1", "research"), ("STEP 2", "brand_guard"),
+                                ("STEP 3", "copywriter"), ("STEP 4", "reviewer")):
+                print(f"  ⏩ {step}: served from pre-warm cache")
+                stages.start(stage)
+                stages.end(stage, f"{stage} served from pre-warm cache")
+            save_result_artifacts(warm["result"])
+            if owns_registry:
+                registry.close()
+            return warm["result"]
 
-    # Create agents
+    # Resolve the brand's vector store + Brand Guard (built on first use)
+    live_brand = registry.get(brand)
+    print(f"🎨 Brand: {live_brand.kit.name}")
+    brand_guard_agent = live_brand.brand_guard_agent
+
+    # Create per-run agents
     print("\n🤖 Creating agents...")
     research_agent = create_research_agent(client)
-    brand_guard_agent = create_brand_guard_agent(client, vector_store_id)
     copywriter_agent = create_copywriter_agent(client)
     reviewer_agent = create_reviewer_agent(client)
-    assistants = [research_agent, brand_guard_agent, copywriter_agent, reviewer_agent]
+    assistants = [research_agent, copywriter_agent, reviewer_agent]
 
     try:
         # ── Step 1: Research Agent (Responses API + web search) ─
         print("\n" + "─" * 60)
         print("📡 STEP 1: Research Agent — Searching the live web...")
         print("─" * 60)
+        stages.start("research")
         
-        research_prompt = (
-            f"Research the following topic: '{topic}'. "
-            f"Find the top 3 most authoritative and recent sources. "
-            f"The research will be used to craft social media posts for a Microsoft employee. "
-            f"Provide a comprehensive research brief in the JSON format specified in your instructions."
-        )
-        research_output = run_research_turn(client, research_agent, research_prompt)
+        warm_brief = cache.get_brief(topic)
+        if interactive:
+            cache.record("research", warm_brief is not None)
+        if warm_brief is not None:
+            print(f"♨️  Warm research brief ({warm_brief['age'] / 60:.0f} min old) — skipping web search")
+            research_output = warm_brief["brief"]
+        else:
+            research_usage: dict = {}
+            research_output, mode = refresh_research(
+                client, research_agent, topic, cache.get_stale_brief(topic), time.time(), usage=research_usage
+            )
+            cache.put_brief(topic, research_output, research_usage, mode=mode)
+            _merge_usage(usage, research_usage)
         print(f"\n📋 Research Brief:\n{research_output[:500]}...\n")
-        save_output("01_research_brief.md", research_output)
+        stages.end("research", "research served warm" if warm_brief is not None else f"research completed ({mode})")
 
         # ── Step 2: Brand Guard Agent ────────────────────────────
         print("\n" + "─" * 60)
         print("🛡️  STEP 2: Brand Guard Agent — Checking compliance...")
         print("─" * 60)
+        stages.start("brand_guard")
 
         guard_thread = client.beta.threads.create()
         guard_prompt = (
-            f"Review the following research brief for brand compliance with Microsoft's employee social media guidelines. "
-            f"Use File Search to retrieve the brand kit and check every rule.\n\n"
+            f"Review the following research brief for brand compliance with the {live_brand.kit.name} "
+            f"social media guidelines. Use File Search to retrieve the brand kit and check every rule.\n\n"
             f"RESEARCH BRIEF:\n{research_output}"
         )
-        guard_output = run_agent_turn(client, brand_guard_agent, guard_thread.id, guard_prompt)
+        guard_output = run_agent_turn(client, brand_guard_agent, guard_thread.id, guard_prompt, usage=usage)
         print(f"\n✅ Compliance Review:\n{guard_output[:500]}...\n")
-        save_output("02_brand_guard_review.md", guard_output)
+        stages.end_turn("brand_guard", guard_output)
 
         # ── Step 3: Copywriter Agent ─────────────────────────────
         print("\n" + "─" * 60)
         print("✍️  STEP 3: Copywriter Agent — Drafting posts...")
         print("─" * 60)
+        stages.start("copywriter")
 
         copy_thread = client.beta.threads.create()
         copy_prompt = (
@@ -116,14 +226,15 @@ def run_pipeline(topic: str):
             f"Generate posts for LinkedIn, X/Twitter, and Microsoft Teams. "
             f"Follow all brand guidelines and include required disclaimers."
         )
-        copy_output = run_agent_turn(client, copywriter_agent, copy_thread.id, copy_prompt)
+        copy_output = run_agent_turn(client, copywriter_agent, copy_thread.id, copy_prompt, usage=usage)
         print(f"\n📝 Draft Posts:\n{copy_output[:500]}...\n")
-        save_output("03_draft_posts.md", copy_output)
+        stages.end_turn("copywriter", copy_output)
 
         # ── Step 4: Reviewer Agent ───────────────────────────────
         print("\n" + "─" * 60)
         print("🔍 STEP 4: Reviewer Agent — Final quality check...")
         print("─" * 60)
+        stages.start("reviewer")
 
         review_thread = client.beta.threads.create()
         review_prompt = (
@@ -133,9 +244,22 @@ def run_pipeline(topic: str):
             f"DRAFT POSTS:\n{copy_output}\n\n"
             f"Apply your full quality checklist. If any post needs revision, provide the improved version."
         )
-        review_output = run_agent_turn(client, reviewer_agent, review_thread.id, review_prompt)
+        review_output = run_agent_turn(client, reviewer_agent, review_thread.id, review_prompt, usage=usage)
         print(f"\n✅ Final Review:\n{review_output[:500]}...\n")
-        save_output("04_final_review.md", review_output)
+        stages.end_turn("reviewer", review_output)
+
+        # ── Save artifacts, then render the UI payload ──────────
+        card_data = {
+            "topic": topic,
+            "brand": live_brand.kit.id,
+            "research": research_output,
+            "compliance": guard_output,
+            "posts": copy_output,
+            "review": review_output,
+            "usage": usage,
+        }
+        if interactive:
+            save_result_artifacts(card_data)
 
         # ── Summary ──────────────────────────────────────────────
         print("\n" + "=" * 60)
@@ -147,33 +271,157 @@ def run_pipeline(topic: str):
         print("  🛡️  02_brand_guard_review.md — Compliance check results")
         print("  ✍️  03_draft_posts.md        — Platform-specific post drafts")
         print("  🔍 04_final_review.md       — Final QA review & approved posts")
+        print("  🃏 ui_payload.json          — Posts, compliance, sources & Adaptive Card")
 
-        # Build summary card data
-        card_data = {
-            "topic": topic,
-            "research": research_output,
-            "compliance": guard_output,
-            "posts": copy_output,
-            "review": review_output,
-        }
-        save_output("pipeline_result.json", json.dumps(card_data, indent=2, default=str))
+        return card_data
+
+    except Exception as e:
+        stages.fail(e)
+        raise
 
     finally:
         # ── Cleanup ──────────────────────────────────────────────
         print("\n🧹 Cleaning up agents...")
         cleanup_agents(client, assistants)
+        if owns_registry:
+            registry.close()
         print("Done! ✨")
 
 
+def _merge_usage(total: dict, usage: dict):
+    for key, value in usage.items():
+        total[key] = total.get(key, 0) + value
+
+
+# ── Pre-warm ─────────────────────────────────────────────────────────
+
+
+def run_prewarm(
+    registry: BrandRegistry,
+    topics_file: str,
+    interval: float,
+    concurrency: int,
+    token_budget: int | None,
+    full: bool,
+    cycles: int | None,
+):
+    """Keep research briefs (and optionally full results) warm for a topic watch list."""
+    client = registry.client
+    cache = ResearchCache()
+    research_agent = create_research_agent(client)
+
+    def refresh_brief(topic: str, usage: dict) -> tuple[str, str]:
+        return refresh_research(client, research_agent, topic, cache.get_stale_brief(topic), time.time(), usage=usage)
+
+    def run_full(topic: str, usage: dict) -> dict:
+        result = run_pipeline(topic, registry=registry, cache=cache, interactive=False)
+        _merge_usage(usage, result["usage"])
+        return result
+
+    scheduler = PrewarmScheduler(
+        cache,
+        refresh_brief,
+        run_full=run_full if full else None,
+        brand=registry.active_brand_id,
+        concurrency=concurrency,
+        token_budget=token_budget,
+    )
+    scheduler.run_forever(topics_file, interval, cycles=cycles)
+
+
+# ── Worker ───────────────────────────────────────────────────────
+
+
+def run_worker(registry: BrandRegistry):
+    """
+    Long-lived worker: reads one JSON request per line from stdin and keeps
+    live brands warm between requests.
+
+    Requests:
+        {"topic": "...", "brand": "github-copilot"}   run the pipeline
+        {"brand": "microsoft-ai"}                     select the active brand
+
+    ``brand`` is optional on run requests; when given it also becomes the
+    active brand.  Each request is answered with a ``WORKER RESULT`` or
+    ``WORKER ERROR`` line followed by a JSON payload; a run's result is the
+    same UI payload that is saved to ``output/ui_payload.json``.  The web app
+    (``web/lib/pipelineWorker.ts``) keeps a small pool of workers running.
+    """
+    print(f"WORKER READY {json.dumps({'brands': registry.brand_ids, 'active': registry.active_brand_id})}")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            if request.get("brand"):
+                registry.select(request["brand"])
+            if request.get("topic"):
+                result = build_ui_payload(run_pipeline(request["topic"], registry=registry))
+            else:
+                result = {"active": registry.active_brand_id}
+            print(f"WORKER RESULT {json.dumps(result, default=str)}")
+        except Exception as e:
+            print(f"WORKER ERROR {json.dumps({'error': str(e)})}")
+
+
 # ── Entry Point ──────────────────────────────────────────────────────
 
 if __name__ == "__main__":
     load_dotenv()
 
-    if len(sys.argv) < 2:
-        topic = "GitHub Copilot agent mode and the future of AI-assisted development"
-        print(f"ℹ️  No topic provided. Using default: '{topic}'")
-    else:
-        topic = " ".join(sys.argv[1:])
+    parser = argparse.ArgumentParser(description="TrendSurf Copilot multi-agent pipeline")
+    parser.add_argument("topic", nargs="*", help="Topic to research and write about")
+    parser.add_argument("--brand", help="Brand ID or preset name (see --list-brands)")
+    parser.add_argument("--list-brands", action="store_true", help="List registered brands and exit")
+    parser.add_argument("--worker", action="store_true", help="Serve JSON-lines requests on stdin")
+    parser.add_argument("--prewarm", metavar="TOPICS_FILE", help="Keep research for a topic watch list warm")
+    parser.add_argument("--interval", default="1h", help="Pre-warm refresh interval, e.g. 30m, 1h (default 1h)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Concurrent pre-warm refreshes (default 2)")
+    parser.add_argument("--budget-tokens", type=int, help="Token budget per pre-warm cycle")
+    parser.add_argument("--full", action="store_true", help="Pre-warm full pipeline results, not just research")
+    parser.add_argument("--cycles", type=int, help="Stop after this many pre-warm cycles")
+    args = parser.parse_args()
 
-    run_pipeline(topic)
+    try:
+        interval = parse_duration(args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.list_brands:
+        manifest = BrandManifest()
+        for kit in manifest.kits.values():
+            marker = "*" if kit.id == manifest.default_brand_id else " "
+            print(f"{marker} {kit.id:<26} {kit.name}  ({kit.kit_path.name})")
+        sys.exit(0)
+
+    registry = BrandRegistry(create_openai_client())
+    try:
+        if args.brand:
+            registry.select(args.brand)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    try:
+        if args.prewarm:
+            run_prewarm(
+                registry,
+                args.prewarm,
+                interval=interval,
+                concurrency=args.concurrency,
+                token_budget=args.budget_tokens,
+                full=args.full,
+                cycles=args.cycles,
+            )
+        elif args.worker:
+            run_worker(registry)
+        else:
+            if not args.topic:
+                topic = "GitHub Copilot agent mode and the future of AI-assisted development"
+                print(f"ℹ️  No topic provided. Using default: '{topic}'")
+            else:
+                topic = " ".join(args.topic)
+            run_pipeline(topic, registry=registry)
+    finally:
+        registry.close()
@@ -0,0 +1,126 @@
+"""Tests for delta research merging (agents/delta_research.py)."""
+
+import json
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("azure.identity")
+
+from agents import delta_research  # noqa: E402
+from agents.delta_research import MAX_FACTS, merge_briefs, normalize_url, refresh_research  # noqa: E402
+from agents.prompts import RESEARCH_AGENT_PROMPT, RESEARCH_DELTA_AGENT_PROMPT  # noqa: E402
+
+PRIOR_SEEN = "2026-01-01T00:00:00+00:00"
+NOW_SEEN = "2026-01-02T00:00:00+00:00"
+
+
+# ── normalize_url ────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://WWW.Example.com/post/", "https://example.com/post"),
+        ("https://example.com/post#section", "https://example.com/post"),
+        ("https://example.com/post?utm_source=x&id=7&fbclid=abc", "https://example.com/post?id=7"),
+        ("  https://example.com  ", "https://example.com/"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_keeps_distinct_pages_apart():
+    assert normalize_url("https://example.com/a") != normalize_url("https://example.com/b")
+    assert normalize_url("https://example.com/?id=1") != normalize_url("https://example.com/?id=2")
+
+
+# ── merge_briefs ─────────────────────────────────────────────────────
+
+
+def _prior():
+    return {
+        "topic": "Edge AI",
+        "summary": "Original summary",
+        "key_facts": ["Known fact"],
+        "sources": [{"title": "Known", "url": "https://www.example.com/known/"}],
+        "trending_hashtags": ["#EdgeAI"],
+    }
+
+
+def test_merge_stamps_and_orders_newest_first():
+    delta = {
+        "key_facts": ["New fact"],
+        "sources": [{"title": "New", "url": "https://news.example.org/new"}],
+        "summary_update": "Something changed",
+    }
+    merged = merge_briefs(_prior(), delta, PRIOR_SEEN, NOW_SEEN)
+
+    assert merged["key_facts"] == [
+        {"fact": "New fact", "seen_at": NOW_SEEN},
+        {"fact": "Known fact", "seen_at": PRIOR_SEEN},
+    ]
+    assert [s["title"] for s in merged["sources"]] == ["New", "Known"]
+    assert merged["sources"][0]["seen_at"] == NOW_SEEN
+    assert merged["sources"][1]["seen_at"] == PRIOR_SEEN
+    assert merged["latest_update"] == {"text": "Something changed", "seen_at": NOW_SEEN}
+    assert merged["last_refreshed"] == NOW_SEEN
+    assert merged["summary"] == "Original summary"
+
+
+def test_merge_dedupes_sources_by_normalized_url_and_facts_by_text():
+    delta = {
+        "key_facts": ["  KNOWN FACT ", "New fact", "new fact"],
+        "sources": [
+            {"title": "Dup", "url": "https://example.com/known?utm_campaign=x"},
+            {"title": "No URL"},
+            "not a dict",
+        ],
+    }
+    merged = merge_briefs(_prior(), delta, PRIOR_SEEN, NOW_SEEN)
+
+    assert [f["fact"] for f in merged["key_facts"]] == ["New fact", "Known fact"]
+    assert [s["title"] for s in merged["sources"]] == ["Known"]
+    assert "latest_update" not in merged
+
+
+def test_merge_keeps_existing_seen_at_and_unions_lists():
+    prior = _prior()
+    prior["key_facts"] = [{"fact": "Known fact", "seen_at": "2025-12-01T00:00:00+00:00"}]
+    delta = {"trending_hashtags": ["#edgeai", "#TinyML"]}
+    merged = merge_briefs(prior, delta, PRIOR_SEEN, NOW_SEEN)
+
+    assert merged["key_facts"][0]["seen_at"] == "2025-12-01T00:00:00+00:00"
+    assert merged["trending_hashtags"] == ["#TinyML", "#EdgeAI"]
+
+
+def test_merge_caps_facts():
+    delta = {"key_facts": [f"Fact {i}" for i in range(MAX_FACTS + 5)]}
+    merged = merge_briefs(_prior(), delta, PRIOR_SEEN, NOW_SEEN)
+    assert len(merged["key_facts"]) == MAX_FACTS
+
+
+# ── refresh_research ─────────────────────────────────────────────────
+
+
+class _Agent:
+    instructions = RESEARCH_AGENT_PROMPT
+    model = "test"
+
+
+def test_delta_turn_uses_delta_instructions(monkeypatch):
+    calls = []
+
+    def fake_turn(client, agent, prompt, usage=None, instructions=None):
+        calls.append(instructions)
+        return json.dumps({"key_facts": ["New fact"], "sources": []})
+
+    monkeypatch.setattr(delta_research, "run_research_turn", fake_turn)
+    prior_entry = {"brief": json.dumps(_prior()), "refreshed_at": 1_000_000.0}
+
+    brief, mode = refresh_research(None, _Agent(), "Edge AI", prior_entry, now=1_000_000.0 + 3600)
+
+    assert mode == "delta"
+    assert calls == [RESEARCH_DELTA_AGENT_PROMPT]
+    assert json.loads(brief)["key_facts"][0]["fact"] == "New fact"
@@ -0,0 +1,54 @@
+"""Tests for the pre-warm scheduler (agents/prewarm.py)."""
+
+from agents.prewarm import PrewarmScheduler, failed_stages
+from agents.research_cache import ResearchCache
+
+GOOD_RESULT = {
+    "topic": "Edge AI",
+    "research": "{}",
+    "compliance": "{}",
+    "posts": "{}",
+    "review": "looks good",
+}
+
+
+def _scheduler(tmp_path, result):
+    cache = ResearchCache(tmp_path, ttl=3600)
+
+    def refresh_brief(topic, usage):
+        usage["total_tokens"] = 10
+        return "{}", "full"
+
+    def run_full(topic, usage):
+        usage["total_tokens"] = 100
+        return dict(result)
+
+    return cache, PrewarmScheduler(cache, refresh_brief, run_full=run_full, brand="github-copilot")
+
+
+def test_failed_stages_detects_error_turns():
+    assert failed_stages(GOOD_RESULT) == []
+    result = {**GOOD_RESULT, "posts": "ERROR: Agent run failed — rate limited"}
+    assert failed_stages(result) == ["posts"]
+
+
+def test_result_with_failed_stage_is_not_cached(tmp_path):
+    failing = {**GOOD_RESULT, "compliance": "ERROR: No response from agent"}
+    cache, scheduler = _scheduler(tmp_path, failing)
+
+    report = scheduler.run_cycle(["Edge AI"], max_age=3600)
+
+    assert report["failed"] == 1
+    assert report["refreshed"] == 0
+    assert cache.get_result("Edge AI", "github-copilot") is None
+    # The research brief itself was fine and stays warm
+    assert cache.get_brief("Edge AI") is not None
+
+
+def test_successful_result_is_cached(tmp_path):
+    cache, scheduler = _scheduler(tmp_path, GOOD_RESULT)
+
+    report = scheduler.run_cycle(["Edge AI"], max_age=3600)
+
+    assert report["refreshed"] == 1
+    assert cache.get_result("Edge AI", "github-copilot")["result"] == GOOD_RESULT
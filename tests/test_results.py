@@ -0,0 +1,158 @@
+"""Tests for result assembly and Adaptive Card rendering (agents/results.py)."""
+
+import json
+
+import pytest
+
+from agents.results import (
+    CARD_TEMPLATE_PATH,
+    DEMO_PAYLOAD_PATH,
+    DEMO_TOPIC,
+    assemble_result,
+    build_ui_payload,
+    load_card_template,
+    render_artifacts,
+    render_card_naive,
+)
+
+
+def _raw(**agent_json):
+    """A raw pipeline result whose agent outputs are the given JSON values."""
+    raw = {"topic": "Edge AI", "brand": "github-copilot"}
+    for field, value in agent_json.items():
+        raw[field] = json.dumps(value)
+    return raw
+
+
+# ── Malformed agent JSON ─────────────────────────────────────────────
+
+
+@pytest.mark.parametrize(
+    "posts",
+    [
+        {"twitter": "hello"},
+        {"twitter": None, "linkedin": ["a"], "teams": 5},
+        {"twitter": {"content": None}},
+    ],
+)
+def test_non_object_posts_fall_back_to_placeholders(posts):
+    result = assemble_result(_raw(posts={"posts": posts}))
+
+    assert result.linkedin.text == "LinkedIn post content"
+    assert result.x.text == "Twitter post content"
+    assert result.x.char_count == 0
+    assert result.teams.text == "Teams post content"
+
+
+def test_non_string_post_content_is_coerced():
+    result = assemble_result(_raw(posts={"posts": {"twitter": {"content": 42}}}))
+    assert result.x.text == "42"
+    assert result.x.char_count == 2
+
+
+@pytest.mark.parametrize("checklist", [["voice_tone"], "all good", 1, None])
+def test_non_object_checklist_fails_every_item(checklist):
+    result = assemble_result(_raw(compliance={"checklist": checklist}))
+    assert [c.status for c in result.checklist] == ["fail"] * 6
+
+
+def test_checklist_flags_map_to_pass_and_fail():
+    result = assemble_result(_raw(compliance={"checklist": {"voice_tone": True, "claims_sourced": False}}))
+    statuses = {c.item: c.status for c in result.checklist}
+    assert statuses["Voice & Tone"] == "pass"
+    assert statuses["Claims Sourced"] == "fail"
+
+
+def test_non_list_disclaimers_use_defaults():
+    result = assemble_result(_raw(posts={"posts": {}, "disclaimers_included": "Views are my own"}, compliance={}))
+    assert "Views are my own" not in result.disclaimers
+    assert len(result.disclaimers) == 2
+
+
+def test_non_string_source_fields_are_coerced():
+    research = {"sources": [{"title": 5, "url": None}, "not a source", {"title": "Docs", "url": "https://x.dev"}]}
+    result = assemble_result(_raw(research=research))
+
+    assert [(s.title, s.url) for s in result.sources] == [("5", ""), ("Docs", "https://x.dev")]
+
+
+def test_non_list_sources_fall_back_to_defaults():
+    result = assemble_result(_raw(research={"sources": 7}))
+    assert len(result.sources) == 3
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        _raw(posts={"posts": {"twitter": "hello"}}),
+        _raw(compliance={"checklist": [{"voice_tone": True}]}),
+        _raw(research={"sources": [{"title": 5, "url": 6}]}),
+        {"topic": None, "brand": None, "research": "not json", "posts": "```json\n[1, 2]\n```"},
+    ],
+)
+def test_ui_payload_renders_for_malformed_outputs(raw):
+    payload = build_ui_payload(raw)
+
+    json.dumps(payload)
+    assert set(payload) >= {"outputs", "compliance", "sources", "artifacts", "adaptiveCard"}
+
+
+def test_render_artifacts_never_builds_the_payload():
+    artifacts = render_artifacts({"topic": "Edge AI", "research": "brief", "posts": None})
+
+    assert "ui_payload.json" not in artifacts
+    assert artifacts["01_research_brief.md"] == "brief"
+    assert artifacts["03_draft_posts.md"] == ""
+    assert json.loads(artifacts["pipeline_result.json"])["topic"] == "Edge AI"
+
+
+# ── Compiled Adaptive Card ───────────────────────────────────────────
+
+CARD_SAMPLES = [
+    _raw(),
+    _raw(
+        posts={"posts": {
+            "linkedin": {"content": "Line one\nLine two — \"quoted\" and \\backslash\\ " + "x" * 300},
+            "twitter": {"content": "Ünïcödé 🚀 $5 off ${not_a_slot} #AI"},
+            "teams": {"content": "<b>html</b> & tabs\there"},
+        }},
+        research={"sources": [
+            {"title": "Docs \"v2\"", "url": "https://example.com/a?b=1&c=2"},
+            {"title": "", "url": ""},
+        ]},
+    ),
+    {"topic": "Topic with \"quotes\", \\ and\nnewline", "brand": "x", "research": "see https://a.example/x"},
+]
+
+
+@pytest.mark.parametrize("raw", CARD_SAMPLES)
+def test_compiled_card_matches_naive_render(raw):
+    values = assemble_result(raw).card_values()
+    template_text = CARD_TEMPLATE_PATH.read_text(encoding="utf-8")
+
+    assert load_card_template().render(values) == render_card_naive(template_text, values)
+
+
+def test_compiled_card_leaves_template_untouched():
+    card = load_card_template()
+    first = card.render(assemble_result(CARD_SAMPLES[1]).card_values())
+    second = card.render(assemble_result(CARD_SAMPLES[0]).card_values())
+
+    assert first != second
+    assert "${" not in json.dumps(second)
+
+
+# ── Demo payload ─────────────────────────────────────────────────────
+
+
+def test_demo_payload_is_up_to_date():
+    """data/demo_ui_payload.json must match `python -m agents.results --write-demo`."""
+    committed = json.loads(DEMO_PAYLOAD_PATH.read_text(encoding="utf-8"))
+    assert committed == build_ui_payload({"topic": DEMO_TOPIC})
+
+
+def test_demo_payload_carries_topic_placeholder():
+    payload = json.loads(DEMO_PAYLOAD_PATH.read_text(encoding="utf-8"))
+    for platform in ("linkedin", "x", "teams"):
+        assert "${topic}" in payload["outputs"][platform]["text"]
+    assert "${topic}" in json.dumps(payload["adaptiveCard"])
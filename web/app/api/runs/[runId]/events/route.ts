@@ -1,102 +1,66 @@
 import { NextRequest } from 'next/server';
-import { activeRuns } from '../../../generate/route';
+import { runEventBus, RunEvent } from '@/lib/runEventBus';
 
+/**
+ * GET /api/runs/:runId/events
+ *
+ * Server-Sent Events stream for a pipeline run.  Events are pushed from the
+ * run event bus as the pipeline publishes them.  Each message carries its
+ * offset as the SSE `id`, so a reconnecting EventSource (Last-Event-ID header)
+ * or a `?from=<offset>` query resumes with replay from that point.
+ */
 export async function GET(
   request: NextRequest,
   { params }: { params: Promise<{ runId: string }> }
 ) {
   const { runId } = await params;
 
-  // Set up SSE headers
+  const lastEventId = request.headers.get('last-event-id');
+  const fromParam = request.nextUrl.searchParams.get('from');
+  const fromOffset = lastEventId !== null
+    ? Number(lastEventId) + 1
+    : Number(fromParam ?? 0);
+
   const encoder = new TextEncoder();
+  let unsubscribe: (() => void) | null = null;
+
   const stream = new ReadableStream({
-    async start(controller) {
-      const runState = activeRuns.get(runId);
+    start(controller) {
+      let closed = false;
+      const close = () => {
+        if (closed) return;
+        closed = true;
+        unsubscribe?.();
+        controller.close();
+      };
 
-      if (!runState) {
+      unsubscribe = runEventBus.subscribe(
+        runId,
+        Number.isFinite(fromOffset) ? fromOffset : 0,
+        (event: RunEvent, offset: number) => {
+          if (closed) return;
+          controller.enqueue(encoder.encode(`id: ${offset}\ndata: ${JSON.stringify(event)}\n\n`));
+          if (event.type === 'complete' || event.type === 'error') {
+            close();
+          }
+        }
+      );
+
+      if (!unsubscribe) {
         controller.enqueue(
           encoder.encode(
             `data: ${JSON.stringify({ type: 'error', message: 'Run not found' })}\n\n`
           )
         );
-        controller.close();
+        close();
         return;
       }
 
-      let lastStageCount = 0;
-
-      // Poll for updates
-      const interval = setInterval(() => {
-        const currentRunState = activeRuns.get(runId);
-
-        if (!currentRunState) {
-          clearInterval(interval);
-          controller.close();
-          return;
-        }
-
-        // Send new stage events
-        if (currentRunState.stages.length > lastStageCount) {
-          const newStages = currentRunState.stages.slice(lastStageCount);
-          newStages.forEach((stage: any) => {
-            const event = {
-              type: 'stage_event',
-              runId,
-              stage: stage.name,
-              status: stage.status,
-              summary: stage.summary,
-              timestamps: {
-                startedAt: stage.startedAt,
-                endedAt: stage.endedAt,
-                duration: stage.duration,
-              },
-              artifactPaths: {
-                output: `output/${stage.name}.md`,
-              },
-              input: {},
-              output: {},
-              artifacts: {},
-              citations: [],
-            };
-
-            controller.enqueue(encoder.encode(`data: ${JSON.stringify(event)}\n\n`));
-          });
-
-          lastStageCount = currentRunState.stages.length;
-        }
-
-        // Send completion event
-        if (currentRunState.status === 'complete' && currentRunState.result) {
-          const completeEvent = {
-            type: 'complete',
-            runId,
-            result: currentRunState.result,
-          };
-
-          controller.enqueue(encoder.encode(`data: ${JSON.stringify(completeEvent)}\n\n`));
-          clearInterval(interval);
-          controller.close();
-        }
-
-        // Send error event
-        if (currentRunState.status === 'error') {
-          const errorEvent = {
-            type: 'error',
-            runId,
-            message: currentRunState.error || 'Unknown error',
-          };
-
-          controller.enqueue(encoder.encode(`data: ${JSON.stringify(errorEvent)}\n\n`));
-          clearInterval(interval);
-          controller.close();
-        }
-      }, 500);
-
       // Cleanup on client disconnect
-      request.signal.addEventListener('abort', () => {
-        clearInterval(interval);
-        controller.close();
-      });
+      request.signal.addEventListener('abort', close);
+    },
+    cancel() {
+      unsubscribe?.();
     },
   });
 
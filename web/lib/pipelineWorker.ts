@@ -0,0 +1,250 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { existsSync, readFileSync } from 'fs';
+import path from 'path';
+
+/**
+ * Pool of long-lived Python pipeline workers.
+ *
+ * Spawning `main.py` per request pays the full cold start every time: Python
+ * start-up, the brand kit upload/indexing and the Brand Guard assistant.  The
+ * web app instead keeps up to PIPELINE_WORKERS `main.py --worker` processes
+ * running and sends each one JSON request per line on stdin, so every
+ * worker's brand LRU (and its compiled Adaptive Card template) stays warm
+ * between runs.
+ *
+ * Each worker runs one pipeline at a time, so up to PIPELINE_WORKERS runs
+ * proceed in parallel.  Further runs wait in a FIFO queue of at most
+ * PIPELINE_QUEUE_LIMIT entries and are told their position with a `queued`
+ * event; beyond that `run` rejects with PipelineQueueFullError.  `EVENT {json}`
+ * progress lines are forwarded to the worker's current run, and the run
+ * settles on the worker's `WORKER RESULT` / `WORKER ERROR` line.  A run that
+ * exceeds RUN_TIMEOUT_MS (counted from when it reaches a worker) kills that
+ * worker, which is respawned on its next run.
+ */
+
+const RUN_TIMEOUT_MS = Number(process.env.PIPELINE_TIMEOUT_MS) || 180_000;
+const POOL_SIZE = Math.max(1, Number(process.env.PIPELINE_WORKERS) || 2);
+const QUEUE_LIMIT = Number(process.env.PIPELINE_QUEUE_LIMIT) || 8;
+const STDERR_TAIL_CHARS = 2_000;
+
+const EVENT_PREFIX = 'EVENT ';
+const RESULT_PREFIX = 'WORKER RESULT ';
+const ERROR_PREFIX = 'WORKER ERROR ';
+
+/**
+ * Receives each `EVENT` line main.py prints while a run is in progress, plus
+ * `{ type: 'queued', position }` while the run waits for a free worker.
+ */
+export type PipelineEventListener = (event: any) => void;
+
+/** Raised when every worker is busy and the wait queue is full. */
+export class PipelineQueueFullError extends Error {
+  constructor() {
+    super(`Pipeline queue is full (${POOL_SIZE} running, ${QUEUE_LIMIT} waiting)`);
+    this.name = 'PipelineQueueFullError';
+  }
+}
+
+interface PipelineRequest {
+  topic: string;
+  brand: string;
+}
+
+interface QueuedRun {
+  request: PipelineRequest;
+  onEvent: PipelineEventListener;
+  resolve: (payload: any) => void;
+  reject: (err: Error) => void;
+}
+
+interface ActiveRun {
+  onEvent: PipelineEventListener;
+  resolve: (payload: any) => void;
+  reject: (err: Error) => void;
+}
+
+/** Read a .env file and return key-value pairs (simple parser). */
+function parseDotEnv(filepath: string): Record<string, string> {
+  const result: Record<string, string> = {};
+  try {
+    const content = readFileSync(filepath, 'utf-8');
+    for (const line of content.split('\n')) {
+      const trimmed = line.trim();
+      if (!trimmed || trimmed.startsWith('#')) continue;
+      const eqIdx = trimmed.indexOf('=');
+      if (eqIdx === -1) continue;
+      const key = trimmed.substring(0, eqIdx).trim();
+      let value = trimmed.substring(eqIdx + 1).trim();
+      // Strip surrounding quotes
+      if ((value.startsWith('"') && value.endsWith('"')) ||
+          (value.startsWith("'") && value.endsWith("'"))) {
+        value = value.slice(1, -1);
+      }
+      result[key] = value;
+    }
+  } catch { /* .env may not exist */ }
+  return result;
+}
+
+/** One `main.py --worker` process; runs a single pipeline at a time. */
+class PipelineWorker {
+  private process: ChildProcessWithoutNullStreams | null = null;
+  private active: ActiveRun | null = null;
+  private stderrTail = '';
+
+  constructor(private projectRoot: string, private id: number) {}
+
+  get busy(): boolean {
+    return this.active !== null;
+  }
+
+  execute(request: PipelineRequest, onEvent: PipelineEventListener): Promise<any> {
+    return new Promise((resolve, reject) => {
+      const proc = this.ensureProcess();
+      const timer = setTimeout(() => {
+        console.error(`[pipeline] Run exceeded ${RUN_TIMEOUT_MS} ms — restarting worker ${this.id}`);
+        proc.kill();
+      }, RUN_TIMEOUT_MS);
+
+      this.active = {
+        onEvent,
+        resolve: (payload) => { clearTimeout(timer); this.active = null; resolve(payload); },
+        reject: (err) => { clearTimeout(timer); this.active = null; reject(err); },
+      };
+      proc.stdin.write(JSON.stringify(request) + '\n');
+    });
+  }
+
+  private ensureProcess(): ChildProcessWithoutNullStreams {
+    if (this.process) return this.process;
+
+    // Load .env from project root so the Python process gets Azure creds
+    const childEnv = {
+      ...process.env,
+      ...parseDotEnv(path.join(this.projectRoot, '.env')),
+      // Force UTF-8 so emoji/unicode chars in print() don't crash on Windows cp1252
+      PYTHONIOENCODING: 'utf-8',
+      PYTHONUTF8: '1',
+      // Force unbuffered stdout so progress events stream in real-time (not batched at exit)
+      PYTHONUNBUFFERED: '1',
+    };
+
+    // Resolve Python – prefer the project venv
+    const isWin = process.platform === 'win32';
+    const venvPython = path.join(
+      this.projectRoot,
+      '.venv',
+      isWin ? 'Scripts' : 'bin',
+      isWin ? 'python.exe' : 'python'
+    );
+    const pythonPath = existsSync(venvPython) ? venvPython : process.env.PYTHON_PATH || 'python';
+    const mainPath = path.join(this.projectRoot, 'main.py');
+
+    console.log(`[pipeline] Starting worker ${this.id}: ${pythonPath} -u ${mainPath} --worker`);
+    const proc = spawn(pythonPath, ['-u', mainPath, '--worker'], {
+      cwd: this.projectRoot,
+      env: childEnv,
+    });
+    this.process = proc;
+    this.stderrTail = '';
+
+    let pendingLine = '';
+    proc.stdout.on('data', (data: Buffer) => {
+      // Chunks can split lines; only complete lines are parsed
+      const lines = (pendingLine + data.toString()).split('\n');
+      pendingLine = lines.pop() ?? '';
+      for (const line of lines) {
+        this.handleLine(line.trim());
+      }
+    });
+
+    // A worker that dies at start-up closes stdin under the first write (EPIPE);
+    // without a listener that error would crash the server
+    proc.stdin.on('error', (err) => {
+      console.error(`[pipeline] Worker ${this.id} stdin error:`, err.message);
+      // Respawn on the next run rather than writing to the dead process again
+      if (this.process === proc) this.process = null;
+      this.active?.reject(err);
+    });
+
+    proc.stderr.on('data', (data: Buffer) => {
+      this.stderrTail = (this.stderrTail + data.toString()).slice(-STDERR_TAIL_CHARS);
+    });
+
+    proc.on('close', (code) => {
+      if (this.process === proc) this.process = null;
+      console.log(`[pipeline] Worker ${this.id} exited ${code}, stderr: ${this.stderrTail.slice(-500)}`);
+      this.active?.reject(new Error(`Pipeline worker exited (${code})`));
+    });
+
+    proc.on('error', (err) => {
+      if (this.process === proc) this.process = null;
+      this.active?.reject(err);
+    });
+
+    return proc;
+  }
+
+  private handleLine(line: string) {
+    const run = this.active;
+    if (!run) return;
+    try {
+      if (line.startsWith(EVENT_PREFIX)) {
+        run.onEvent(JSON.parse(line.slice(EVENT_PREFIX.length)));
+      } else if (line.startsWith(RESULT_PREFIX)) {
+        run.resolve(JSON.parse(line.slice(RESULT_PREFIX.length)));
+      } else if (line.startsWith(ERROR_PREFIX)) {
+        run.reject(new Error(JSON.parse(line.slice(ERROR_PREFIX.length)).error));
+      }
+    } catch { /* not a well-formed protocol line */ }
+  }
+}
+
+class PipelineWorkerPool {
+  private workers: PipelineWorker[];
+  private waiting: QueuedRun[] = [];
+
+  constructor(projectRoot: string, size: number) {
+    this.workers = Array.from({ length: size }, (_, i) => new PipelineWorker(projectRoot, i + 1));
+  }
+
+  /** True when a new run would be rejected with PipelineQueueFullError. */
+  get full(): boolean {
+    return !this.workers.some((w) => !w.busy) && this.waiting.length >= QUEUE_LIMIT;
+  }
+
+  /**
+   * Run the pipeline for `topic` with `brand` on a free worker (queueing if
+   * all are busy), forwarding its progress events to `onEvent`.  Resolves
+   * with the UI payload main.py assembles (posts, compliance, sources,
+   * artifacts, Adaptive Card).
+   */
+  run(topic: string, brand: string, onEvent: PipelineEventListener): Promise<any> {
+    if (this.full) return Promise.reject(new PipelineQueueFullError());
+    return new Promise((resolve, reject) => {
+      this.waiting.push({ request: { topic, brand }, onEvent, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  /** Hand waiting runs to idle workers, then tell the rest their position. */
+  private dispatch() {
+    for (const worker of this.workers) {
+      if (worker.busy) continue;
+      const next = this.waiting.shift();
+      if (!next) break;
+      worker
+        .execute(next.request, next.onEvent)
+        .then(next.resolve, next.reject)
+        .finally(() => this.dispatch());
+    }
+    this.waiting.forEach((queued, i) => queued.onEvent({ type: 'queued', position: i + 1 }));
+  }
+}
+
+// Use globalThis to persist across HMR reloads in Next.js dev mode
+const globalForPool = globalThis as unknown as { pipelinePool?: PipelineWorkerPool };
+if (!globalForPool.pipelinePool) {
+  globalForPool.pipelinePool = new PipelineWorkerPool(path.join(process.cwd(), '..'), POOL_SIZE);
+}
+export const pipelinePool = globalForPool.pipelinePool;
@@ -0,0 +1,94 @@
+/**
+ * In-memory event bus for pipeline runs.
+ *
+ * The generate route publishes events as the Python pipeline reports progress,
+ * and every SSE subscriber is pushed each event as it is published — no
+ * polling.  Each run keeps an append-only event log so a subscriber can join
+ * late (or reconnect) and replay from any offset.  Once a run finishes with a
+ * `complete` or `error` event its log is kept for RUN_RETENTION_MS and then
+ * evicted, so memory stays bounded by the runs in flight plus recent ones.
+ */
+
+const RUN_RETENTION_MS = Number(process.env.RUN_RETENTION_MS) || 10 * 60_000;
+
+export interface RunEvent {
+  type: string;
+  runId: string;
+  [key: string]: any;
+}
+
+/** Called with each event and its offset in the run's log. */
+export type RunEventListener = (event: RunEvent, offset: number) => void;
+
+interface RunChannel {
+  events: RunEvent[];
+  listeners: Set<RunEventListener>;
+  finished: boolean;
+  evictTimer?: ReturnType<typeof setTimeout>;
+}
+
+const TERMINAL_EVENT_TYPES = new Set(['complete', 'error']);
+
+class RunEventBus {
+  private runs = new Map<string, RunChannel>();
+
+  /** Register a new run; events can be published to it from now on. */
+  create(runId: string) {
+    this.runs.set(runId, { events: [], listeners: new Set(), finished: false });
+  }
+
+  has(runId: string): boolean {
+    return this.runs.has(runId);
+  }
+
+  /** Append an event to the run's log and push it to every subscriber. */
+  publish(event: RunEvent) {
+    const channel = this.runs.get(event.runId);
+    if (!channel || channel.finished) return;
+
+    const offset = channel.events.push(event) - 1;
+    for (const listener of channel.listeners) {
+      try {
+        listener(event, offset);
+      } catch (err: any) {
+        console.error('[runs] Subscriber failed:', err.message);
+      }
+    }
+
+    if (TERMINAL_EVENT_TYPES.has(event.type)) {
+      channel.finished = true;
+      channel.listeners.clear();
+      channel.evictTimer = setTimeout(() => this.runs.delete(event.runId), RUN_RETENTION_MS);
+    }
+  }
+
+  /**
+   * Replay the run's events from `fromOffset` (always including the terminal
+   * event of a finished run), then receive new ones as they are published.  Returns an unsubscribe function, or null for an unknown
+   * (or already evicted) run.
+   */
+  subscribe(runId: string, fromOffset: number, listener: RunEventListener): (() => void) | null {
+    const channel = this.runs.get(runId);
+    if (!channel) return null;
+
+    // A finished run always replays at least its terminal event, so a client
+    // reconnecting with Last-Event-ID at (or past) the end still sees it and
+    // closes instead of waiting on a run that will publish nothing more.
+    let start = Math.max(0, fromOffset);
+    if (channel.finished) start = Math.min(start, channel.events.length - 1);
+    for (let offset = start; offset < channel.events.length; offset++) {
+      listener(channel.events[offset], offset);
+    }
+
+    if (channel.finished) return () => {};
+    channel.listeners.add(listener);
+    return () => channel.listeners.delete(listener);
+  }
+}
+
+// Use globalThis to persist across HMR reloads in Next.js dev mode
+const globalForBus = globalThis as unknown as { runEventBus?: RunEventBus };
+if (!globalForBus.runEventBus) {
+  globalForBus.runEventBus = new RunEventBus();
+}
+export const runEventBus = globalForBus.runEventBus;
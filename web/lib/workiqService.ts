@@ -0,0 +1,400 @@
+import { spawn } from 'child_process';
+import { promises as fs } from 'fs';
+import path from 'path';
+
+/**
+ * Cached WorkIQ suggestion service.
+ *
+ * Every WorkIQ query spawns the CLI (with npx package resolution) and can take
+ * up to 90 seconds, so suggestions are served from a per-user cache instead:
+ *
+ * - fresh entries (younger than the TTL) are returned immediately;
+ * - stale entries are returned immediately and refreshed in the background;
+ * - only a cache miss waits for WorkIQ, and only then can the fallback list
+ *   be returned (when that first query fails).
+ *
+ * All WorkIQ calls go through a single long-lived worker that runs one query
+ * at a time.  Concurrent requests for the same user + question share one
+ * in-flight refresh, and the worker proactively re-queues default-question
+ * entries that were read within the last TTL shortly before they expire.
+ * Responses without a parseable topic list are treated as failed refreshes:
+ * the previous entry is kept and the error recorded on it.
+ *
+ * The cache is an LRU bounded per user and in total, so arbitrary questions
+ * cannot grow it without limit.
+ *
+ * Default-question suggestions are also merged into a small shared topic list
+ * for `main.py --prewarm` (see storeSuggestionsForPrewarm).  That list is NOT
+ * per user: its topics are researched on the public web on everyone's behalf.
+ */
+
+const TTL_MS = Number(process.env.WORKIQ_CACHE_TTL_MS) || 15 * 60_000;
+const QUERY_TIMEOUT_MS = 90_000;
+// Refresh ahead once an entry reaches this fraction of its TTL
+const REFRESH_AHEAD_RATIO = 0.8;
+// LRU bounds: per user (default question + a few custom ones) and overall
+const MAX_ENTRIES_PER_USER = 4;
+const MAX_ENTRIES = Number(process.env.WORKIQ_CACHE_MAX_ENTRIES) || 200;
+// Size of the shared pre-warm topic list built from WorkIQ suggestions
+const MAX_PREWARM_SUGGESTIONS = 20;
+const WORKER_TICK_MS = 60_000;
+
+export const DEFAULT_QUESTION =
+  'Based on my recent meetings, emails, and Teams discussions from the past week, ' +
+  'what are the top 5 professional topics or themes I have been most involved with? ' +
+  'Return ONLY a JSON array of 5 short topic strings (each under 60 characters), ' +
+  'suitable as social media post topics for a Microsoft employee. ' +
+  'Example format: ["Topic one","Topic two","Topic three","Topic four","Topic five"]';
+
+interface CacheEntry {
+  userId: string;
+  question: string;
+  suggestions: string[];
+  raw: string;
+  refreshedAt: number;
+  lastRefreshMs: number;
+  lastReadAt: number;
+  lastError?: string;
+}
+
+interface RefreshJob {
+  key: string;
+  userId: string;
+  question: string;
+  promise: Promise<CacheEntry>;
+  resolve: (entry: CacheEntry) => void;
+  reject: (err: Error) => void;
+}
+
+export type CacheStatus = 'fresh' | 'stale' | 'miss' | 'fallback';
+
+export interface SuggestionResult {
+  suggestions: string[];
+  raw: string;
+  cache: {
+    status: CacheStatus;
+    ageMs: number | null;
+    refreshedAt: string | null;
+    lastRefreshMs: number | null;
+    refreshing: boolean;
+    ttlMs: number;
+    lastError?: string;
+  };
+}
+
+class WorkIQService {
+  private cache = new Map<string, CacheEntry>();
+  private inflight = new Map<string, RefreshJob>();
+  private queue: RefreshJob[] = [];
+  private working = false;
+
+  constructor() {
+    setInterval(() => this.refreshAhead(), WORKER_TICK_MS);
+  }
+
+  async getSuggestions(userId: string, question: string): Promise<SuggestionResult> {
+    const key = `${userId}\u0000${question}`;
+    const entry = this.cache.get(key);
+    const now = Date.now();
+
+    if (entry) {
+      entry.lastReadAt = now;
+      this.touch(key, entry);
+      const stale = now - entry.refreshedAt >= TTL_MS;
+      if (stale) {
+        // Serve the stale value now; the worker refreshes it in the background
+        this.enqueue(key, userId, question).promise.catch(() => { /* recorded on entry */ });
+      }
+      return this.toResult(key, entry, stale ? 'stale' : 'fresh');
+    }
+
+    try {
+      const fetched = await this.enqueue(key, userId, question).promise;
+      return this.toResult(key, fetched, 'miss');
+    } catch (error: any) {
+      return {
+        suggestions: getFallbackSuggestions(),
+        raw: '',
+        cache: {
+          status: 'fallback',
+          ageMs: null,
+          refreshedAt: null,
+          lastRefreshMs: null,
+          refreshing: this.inflight.has(key),
+          ttlMs: TTL_MS,
+          lastError: error.message,
+        },
+      };
+    }
+  }
+
+  private toResult(key: string, entry: CacheEntry, status: CacheStatus): SuggestionResult {
+    return {
+      suggestions: entry.suggestions,
+      raw: entry.raw,
+      cache: {
+        status,
+        ageMs: Date.now() - entry.refreshedAt,
+        refreshedAt: new Date(entry.refreshedAt).toISOString(),
+        lastRefreshMs: entry.lastRefreshMs,
+        refreshing: this.inflight.has(key),
+        ttlMs: TTL_MS,
+        ...(entry.lastError ? { lastError: entry.lastError } : {}),
+      },
+    };
+  }
+
+  /** Queue a refresh, or join the one already queued/running for this key. */
+  private enqueue(key: string, userId: string, question: string): RefreshJob {
+    const existing = this.inflight.get(key);
+    if (existing) return existing;
+
+    let resolve!: (entry: CacheEntry) => void;
+    let reject!: (err: Error) => void;
+    const promise = new Promise<CacheEntry>((res, rej) => {
+      resolve = res;
+      reject = rej;
+    });
+    const job: RefreshJob = { key, userId, question, promise, resolve, reject };
+    this.inflight.set(key, job);
+    this.queue.push(job);
+    void this.drain();
+    return job;
+  }
+
+  /** The single worker: runs queued WorkIQ queries one at a time. */
+  private async drain() {
+    if (this.working) return;
+    this.working = true;
+    try {
+      let job: RefreshJob | undefined;
+      while ((job = this.queue.shift())) {
+        const started = Date.now();
+        try {
+          const raw = await runWorkIQQuery(job.question);
+          const suggestions = extractSuggestions(raw);
+          if (!suggestions) {
+            throw new Error('WorkIQ response did not contain a topic list');
+          }
+          const previous = this.cache.get(job.key);
+          const entry: CacheEntry = {
+            userId: job.userId,
+            question: job.question,
+            suggestions,
+            raw,
+            refreshedAt: Date.now(),
+            lastRefreshMs: Date.now() - started,
+            lastReadAt: previous?.lastReadAt ?? Date.now(),
+          };
+          this.touch(job.key, entry);
+          console.log(`[workiq] Refreshed suggestions for ${job.userId} in ${entry.lastRefreshMs} ms`);
+          // Custom questions could steer what gets pre-warmed; only the
+          // default question feeds the shared watch list
+          if (job.question === DEFAULT_QUESTION) {
+            await storeSuggestionsForPrewarm(suggestions);
+          }
+          job.resolve(entry);
+        } catch (error: any) {
+          console.error('[workiq] Refresh failed:', error.message);
+          const previous = this.cache.get(job.key);
+          if (previous) previous.lastError = error.message;
+          job.reject(error);
+        } finally {
+          this.inflight.delete(job.key);
+        }
+      }
+    } finally {
+      this.working = false;
+    }
+  }
+
+  /** Store `entry` as the most recently used, then evict over the LRU bounds. */
+  private touch(key: string, entry: CacheEntry) {
+    this.cache.delete(key);
+    this.cache.set(key, entry);
+
+    // Map iteration order is insertion order, so the first match is the LRU
+    let userEntries = 0;
+    for (const other of this.cache.values()) {
+      if (other.userId === entry.userId) userEntries++;
+    }
+    for (const [otherKey, other] of this.cache) {
+      if (userEntries <= MAX_ENTRIES_PER_USER) break;
+      if (other.userId === entry.userId) {
+        this.cache.delete(otherKey);
+        userEntries--;
+      }
+    }
+    for (const oldestKey of this.cache.keys()) {
+      if (this.cache.size <= MAX_ENTRIES) break;
+      this.cache.delete(oldestKey);
+    }
+  }
+
+  /**
+   * Re-queue default-question entries close to expiry that were read within
+   * the last TTL.  Custom questions and idle entries are only refreshed when
+   * read again (served stale meanwhile).
+   */
+  private refreshAhead() {
+    const now = Date.now();
+    for (const [key, entry] of this.cache) {
+      if (entry.question !== DEFAULT_QUESTION || now - entry.lastReadAt > TTL_MS) continue;
+      if (now - entry.refreshedAt >= TTL_MS * REFRESH_AHEAD_RATIO) {
+        this.enqueue(key, entry.userId, entry.question).promise.catch(() => { /* recorded on entry */ });
+      }
+    }
+  }
+}
+
+// Use globalThis so the cache and worker survive HMR reloads in Next.js dev mode
+const globalForWorkIQ = globalThis as unknown as { workiqService?: WorkIQService };
+if (!globalForWorkIQ.workiqService) {
+  globalForWorkIQ.workiqService = new WorkIQService();
+}
+export const workiqService = globalForWorkIQ.workiqService;
+
+/**
+ * Spawn the WorkIQ CLI (`ask -q "..."`) and capture its stdout.
+ *
+ * Set WORKIQ_COMMAND to a globally installed `workiq` binary to skip npx
+ * entirely; otherwise npx runs with --prefer-offline so an already cached
+ * package is used without a registry round-trip.
+ *
+ * IMPORTANT: WorkIQ requires stdin to be inherited (TTY detection). Without
+ * it, the CLI exits with code 0 but produces zero output. We pass
+ * `stdio: ['inherit', 'pipe', 'pipe']` so the child process inherits the
+ * server's stdin (which is connected to a terminal when running `next dev`).
+ */
+function runWorkIQQuery(question: string): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const safeQ = question.replace(/"/g, '\\"');
+    const command = process.env.WORKIQ_COMMAND || 'npx -y --prefer-offline @microsoft/workiq';
+    const proc = spawn(
+      command,
+      ['ask', '-q', `"${safeQ}"`],
+      {
+        shell: true,
+        env: { ...process.env },
+        stdio: ['inherit', 'pipe', 'pipe'],
+      },
+    );
+
+    let stdout = '';
+    let stderr = '';
+
+    proc.stdout.on('data', (data: Buffer) => {
+      stdout += data.toString();
+    });
+    proc.stderr.on('data', (data: Buffer) => {
+      stderr += data.toString();
+    });
+
+    const timeout = setTimeout(() => {
+      try { proc.kill(); } catch { /* ignore */ }
+      reject(new Error(`WorkIQ query timed out after ${QUERY_TIMEOUT_MS / 1000} seconds`));
+    }, QUERY_TIMEOUT_MS);
+
+    proc.on('close', (code) => {
+      clearTimeout(timeout);
+      if (stdout.trim()) {
+        resolve(stdout.trim());
+      } else {
+        reject(new Error(`WorkIQ exited with code ${code}: ${stderr.slice(0, 500)}`));
+      }
+    });
+
+    proc.on('error', (err) => {
+      clearTimeout(timeout);
+      reject(err);
+    });
+  });
+}
+
+/**
+ * Parse a JSON array of topic strings from the WorkIQ response.
+ * The LLM may wrap the array in markdown fences or surrounding prose.
+ * Returns null when no topic list can be found.
+ */
+function extractSuggestions(text: string): string[] | null {
+  // Strategy 1: Find a JSON array anywhere in the text
+  const arrayMatch = text.match(/\[[\s\S]*?\]/);
+  if (arrayMatch) {
+    try {
+      const parsed = JSON.parse(arrayMatch[0]);
+      if (Array.isArray(parsed) && parsed.every((s) => typeof s === 'string')) {
+        return parsed.slice(0, 5);
+      }
+    } catch { /* fall through */ }
+  }
+
+  // Strategy 2: Extract numbered/bulleted items
+  const lines = text.split('\n');
+  const items: string[] = [];
+  for (const line of lines) {
+    const cleaned = line
+      .replace(/^[\s\-*•\d.]+/, '')
+      .replace(/\*\*/g, '')
+      .trim();
+    if (cleaned.length > 10 && cleaned.length < 80 && !cleaned.startsWith('##')) {
+      items.push(cleaned);
+    }
+    if (items.length >= 5) break;
+  }
+
+  if (items.length >= 3) return items.slice(0, 5);
+
+  return null;
+}
+
+/**
+ * Merge freshly parsed default-question suggestions into the shared topic
+ * list `main.py --prewarm` adds to its watch list on the next cycle.
+ *
+ * The list is shared data, not per user: newest topics first, de-duplicated
+ * case-insensitively and capped at MAX_PREWARM_SUGGESTIONS, so no single
+ * refresh replaces everyone else's topics.
+ */
+async function storeSuggestionsForPrewarm(suggestions: string[]): Promise<void> {
+  try {
+    const cacheDir = path.join(process.cwd(), '..', 'output', 'cache');
+    const filePath = path.join(cacheDir, 'workiq_suggestions.json');
+    let stored: string[] = [];
+    try {
+      const existing = JSON.parse(await fs.readFile(filePath, 'utf-8'));
+      if (Array.isArray(existing.suggestions)) {
+        stored = existing.suggestions.filter((s: unknown) => typeof s === 'string');
+      }
+    } catch { /* first write, or unreadable file */ }
+
+    const seen = new Set<string>();
+    const merged = [...suggestions, ...stored].filter((topic) => {
+      const key = topic.trim().toLowerCase();
+      if (!key || seen.has(key)) return false;
+      seen.add(key);
+      return true;
+    }).slice(0, MAX_PREWARM_SUGGESTIONS);
+
+    // Write-then-rename so the pre-warm process never reads a partial file
+    await fs.mkdir(cacheDir, { recursive: true });
+    const tmpPath = `${filePath}.${process.pid}.tmp`;
+    await fs.writeFile(
+      tmpPath,
+      JSON.stringify({ suggestions: merged, storedAt: new Date().toISOString() }, null, 2),
+      'utf-8',
+    );
+    await fs.rename(tmpPath, filePath);
+  } catch (err: any) {
+    console.warn('[workiq] Could not store suggestions for pre-warm:', err.message);
+  }
+}
+
+export function getFallbackSuggestions(): string[] {
+  return [
+    'AI adoption challenges and change management',
+    'Customer Zero initiative and use-case mapping',
+    'Azure platform delivery and networking',
+    'AI agent development and enablement',
+    'Cloud-native infrastructure trends',
+  ];
+}